@@ -0,0 +1,68 @@
+"""Helpers around the Flask-Caching :data:`~canaille.app.flask.cache`.
+
+The cache is only shared between workers when :attr:`~canaille.app.configuration.RootSettings.CACHE_TYPE`
+is not process local, for instance with ``FileSystemCache``. The helpers here
+work the same way with any cache type.
+"""
+
+import time
+from collections import Counter
+
+from flask import current_app
+
+from canaille.app.flask import cache
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+def cache_metrics() -> Counter:
+    """Return the hit and miss counters of the current worker.
+
+    The keys are ``(namespace, "hits")`` and ``(namespace, "misses")`` tuples.
+    """
+    return current_app.extensions.setdefault("canaille_cache_metrics", Counter())
+
+
+def record(namespace: str, hit: bool) -> None:
+    """Count a cache hit or a cache miss for *namespace*."""
+    cache_metrics()[namespace, "hits" if hit else "misses"] += 1
+
+
+def get_or_build(key: str, build, namespace: str, wait: float = LOCK_TIMEOUT):
+    """Read *key* from the cache, or call *build* to compute it.
+
+    *build* returns a ``(value, timeout)`` tuple. A ``None`` timeout means the
+    value must not be cached.
+
+    On a miss, a lock is taken on *key* so a single worker computes the value,
+    while the others wait for it during at most *wait* seconds, then compute it
+    themselves.
+    """
+    value = cache.get(key)
+    record(namespace, value is not None)
+    if value is not None:
+        return value
+
+    lock_key = f"lock:{key}"
+    deadline = time.monotonic() + wait
+    while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        time.sleep(LOCK_POLL_INTERVAL)
+        if (value := cache.get(key)) is not None:
+            return value
+
+        if time.monotonic() > deadline:
+            value, _ = build()
+            return value
+
+    try:
+        if (value := cache.get(key)) is not None:
+            return value
+
+        value, timeout = build()
+        if timeout is not None:
+            cache.set(key, value, timeout=timeout)
+        return value
+
+    finally:
+        cache.delete(lock_key)
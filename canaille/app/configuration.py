@@ -193,10 +193,21 @@ class RootSettings(BaseSettings):
     CACHE_TYPE: str = "SimpleCache"
     """The cache type.
 
-    The default ``SimpleCache`` is a lightweight in-memory cache.
+    The default ``SimpleCache`` is a lightweight in-memory cache, that is not
+    shared between the workers of a same server.
+    When running several workers, ``FileSystemCache`` shares the cache through
+    the :attr:`CACHE_DIR` directory without needing an external service.
+    This shares the JWT client assertion replay protection, and the downloaded
+    client JWKS.
     See the :doc:`Flask-Caching documentation <flask-caching:index>` for further details.
     """
 
+    CACHE_DIR: str | None = None
+    """The directory where ``FileSystemCache`` stores the cache entries.
+
+    The directory must be writable by all the workers.
+    """
+
     PERMANENT_SESSION_LIFETIME: datetime.timedelta = datetime.timedelta(days=30)
     """The Flask :external:py:data:`PERMANENT_SESSION_LIFETIME` configuration setting.
 
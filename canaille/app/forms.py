@@ -283,17 +283,21 @@ class TableForm(I18NFormMixin, FlaskForm):
     ):
         filter = filter or {}
         super().__init__(**kwargs)
+        self.page_size = page_size
+        first_item = (self.page.data - 1) * self.page_size
+
         if self.query.data:
-            self.items = Backend.instance.fuzzy(cls, self.query.data, fields, **filter)
+            items = Backend.instance.fuzzy(cls, self.query.data, fields, **filter)
+            self.nb_items = len(items)
+            last_item = min((self.page.data) * self.page_size, self.nb_items)
+            self.items_slice = items[first_item:last_item]
         else:
-            self.items = Backend.instance.query(cls, **filter)
+            self.nb_items = Backend.instance.count(cls, **filter)
+            self.items_slice = Backend.instance.query(
+                cls, offset=max(first_item, 0), limit=self.page_size, **filter
+            )
 
-        self.page_size = page_size
-        self.nb_items = len(self.items)
         self.page_max = max(1, math.ceil(self.nb_items / self.page_size))
-        first_item = (self.page.data - 1) * self.page_size
-        last_item = min((self.page.data) * self.page_size, self.nb_items)
-        self.items_slice = self.items[first_item:last_item]
 
     page = wtforms.IntegerField(default=1)
     query = wtforms.StringField(default="")
@@ -9,9 +9,11 @@ from math import ceil
 
 from blinker import signal
 from flask import g
+from flask import has_app_context
 
 from canaille.app import classproperty
 from canaille.app.i18n import gettext as _
+from canaille.backends.filters import comparisons
 
 
 def is_meaningful_value(value) -> bool:
@@ -117,6 +119,7 @@ class Backend:
 
     def teardown(self) -> None:
         """Is called after each http request, it should close the connections to the backend."""
+        self.clear_identity_map()
 
     @classmethod
     def check_network_config(cls, config) -> None:
@@ -127,7 +130,18 @@ class Backend:
         """
         raise NotImplementedError()
 
-    def query(self, model, *args, **kwargs):
+    def query(
+        self,
+        model,
+        *args,
+        offset: int | None = None,
+        limit: int | None = None,
+        order_by: str | None = None,
+        descending: bool = False,
+        fields: list[str] | None = None,
+        where=None,
+        **kwargs,
+    ):
         """Perform a query on the database and return a collection of instances.
 
         Parameters can be any valid attribute with the expected value:
@@ -143,33 +157,230 @@ class Backend:
         models that matches any of the values:
 
         >>> backend.query(User, first_name=["George", "Jane"])
+
+        The results can be sorted on an attribute, and paginated. Backends
+        perform the sorting and the pagination themselves, so only the
+        requested instances are loaded:
+
+        >>> backend.query(User, order_by="user_name", offset=50, limit=25)
+
+        Only single-valued attributes that are not references to other models
+        can be sorted on, otherwise a :class:`ValueError` is raised. When the
+        results are paginated, they are always sorted, by default on their
+        :attr:`~canaille.backends.models.Model.id`, so pages are stable.
+
+        ``fields`` restricts the attributes that are initially loaded. The
+        other attributes are lazily loaded the first time they are accessed:
+
+        >>> backend.query(User, fields=["user_name"])
+
+        ``where`` takes a :mod:`~canaille.backends.filters` tree, for comparisons
+        other than equality, that backends translate in their own query language:
+
+        >>> backend.query(User, where=Comparison("user_name", "sw", "geo"))
+        """
+        if order_by is not None and not self.is_sortable(model, order_by):
+            raise ValueError(f"Cannot sort {model.__name__} on '{order_by}'")
+
+        self.check_fields(model, fields)
+        self.check_where(model, where)
+        return self.do_query(
+            model,
+            *args,
+            offset=offset,
+            limit=limit,
+            order_by=order_by,
+            descending=descending,
+            fields=fields,
+            where=where,
+            **kwargs,
+        )
+
+    @staticmethod
+    def check_fields(model, fields) -> None:
+        """Raise a :class:`ValueError` if some fields are not model attributes."""
+        for field in fields or []:
+            if field not in model.attributes:
+                raise ValueError(f"{model.__name__} has no attribute '{field}'")
+
+    @staticmethod
+    def check_where(model, where) -> None:
+        """Raise a :class:`ValueError` if a filter cannot be applied on a model.
+
+        References to other models can only be compared for equality, and
+        multi-valued attributes cannot be ordered.
         """
-        return self.do_query(model, *args, **kwargs)
+        if where is None:
+            return
+
+        for comparison in comparisons(where):
+            if comparison.attribute not in model.attributes:
+                raise ValueError(
+                    f"{model.__name__} has no attribute '{comparison.attribute}'"
+                )
+
+            related_model, _ = model.get_model_annotations(comparison.attribute)
+            if related_model is not None and comparison.operator not in ("eq", "ne"):
+                raise ValueError(
+                    f"Cannot compare {model.__name__} '{comparison.attribute}' with '{comparison.operator}'"
+                )
+
+            multiple = typing.get_origin(model.attributes[comparison.attribute]) is list
+            if multiple and comparison.operator in ("gt", "ge", "lt", "le"):
+                raise ValueError(
+                    f"Cannot compare {model.__name__} '{comparison.attribute}' with '{comparison.operator}'"
+                )
 
-    def do_query(self, model, *args, **kwargs):
+    @staticmethod
+    def is_sortable(model, attribute) -> bool:
+        """Indicate whether query results can be sorted on an attribute."""
+        if attribute not in model.attributes:
+            return False
+
+        if typing.get_origin(model.attributes[attribute]) is list:
+            return False
+
+        related_model, _ = model.get_model_annotations(attribute)
+        return related_model is None
+
+    def do_query(
+        self,
+        model,
+        *args,
+        offset=None,
+        limit=None,
+        order_by=None,
+        descending=False,
+        fields=None,
+        where=None,
+        **kwargs,
+    ):
         raise NotImplementedError()
 
-    def count(self, model, *args, **kwargs):
+    def iter_query(
+        self,
+        model,
+        batch_size: int = 100,
+        fields: list[str] | None = None,
+        **kwargs,
+    ):
+        """Work like :meth:`~canaille.backends.Backend.query` but lazily yield the instances.
+
+        The instances are loaded by batches of ``batch_size``, so the memory
+        usage does not depend on the number of matching instances:
+
+        >>> for token in backend.iter_query(Token, batch_size=500):
+        ...     print(token.token_id)
+        """
+        self.check_fields(model, fields)
+        return self.do_iter_query(model, batch_size=batch_size, fields=fields, **kwargs)
+
+    def do_iter_query(self, model, batch_size=100, fields=None, **kwargs):
+        offset = 0
+        while True:
+            batch = self.query(
+                model, offset=offset, limit=batch_size, fields=fields, **kwargs
+            )
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            offset += batch_size
+
+    def count(self, model, *args, where=None, **kwargs):
         """Return the number of instances matching the query without loading them."""
-        return self.do_count(model, *args, **kwargs)
+        self.check_where(model, where)
+        return self.do_count(model, *args, where=where, **kwargs)
+
+    def do_count(self, model, *args, where=None, **kwargs):
+        raise NotImplementedError()
 
-    def do_count(self, model, *args, **kwargs):
+    def exists(self, model, **kwargs) -> bool:
+        """Indicate whether at least one instance matches the query.
+
+        The instances are not loaded, and backends stop searching at the first
+        match:
+
+        >>> backend.exists(User, emails="george@example.org")
+        """
+        return self.do_exists(model, **kwargs)
+
+    def do_exists(self, model, **kwargs) -> bool:
+        raise NotImplementedError()
+
+    def first(self, model, fields: list[str] | None = None, **kwargs):
+        """Return one instance matching the query, or :py:data:`None`.
+
+        Unlike :meth:`~canaille.backends.Backend.get`, the backend stops
+        searching at the first match, and no instance is kept in the
+        identity map:
+
+        >>> backend.first(User, emails="george@example.org")
+        """
+        self.check_fields(model, fields)
+        return self.do_first(model, fields=fields, **kwargs)
+
+    def do_first(self, model, fields=None, **kwargs):
         raise NotImplementedError()
 
     def fuzzy(self, model, query, attributes=None, **kwargs):
         """Work like :meth:`~canaille.backends.Backend.query` but attribute values loosely be matched."""
         raise NotImplementedError()
 
-    def get(self, model, identifier=None, **kwargs):
-        """Work like :meth:`~canaille.backends.Backend.query` but return only one element or :py:data:`None` if no item is matching."""
+    def get(self, model, identifier=None, /, fields=None, **kwargs):
+        """Work like :meth:`~canaille.backends.Backend.query` but return only one element or :py:data:`None` if no item is matching.
+
+        During a request, the instances are kept in an identity map, so
+        repeated lookups return the same instance without reaching the
+        backend. The identity map is cleared whenever an instance is saved
+        or deleted, and at the end of the request.
+        """
+        self.check_fields(model, fields)
+        identity_map = self.identity_map()
+        key = (
+            model.__name__,
+            identifier,
+            tuple(fields) if fields else None,
+            tuple(sorted(kwargs.items())),
+        )
+        try:
+            instance = identity_map.get(key) if identity_map is not None else None
+        except TypeError:
+            # unhashable lookup values, such as lists, are not cached
+            identity_map = None
+            instance = None
+
+        if instance is None:
+            instance = self.do_get(model, identifier, fields=fields, **kwargs)
+            if instance is not None and identity_map is not None:
+                identity_map[key] = instance
+
+        return instance
+
+    def do_get(self, model, identifier=None, /, fields=None, **kwargs):
         raise NotImplementedError()
 
+    def identity_map(self) -> dict | None:
+        """Return the instances fetched by :meth:`~canaille.backends.Backend.get` during the current request.
+
+        Return :py:data:`None` outside of an application context, or when
+        the backend already provides its own identity map.
+        """
+        if not has_app_context():
+            return None
+
+        return g.setdefault("identity_map", {})
+
+    def clear_identity_map(self) -> None:
+        if has_app_context():
+            g.pop("identity_map", None)
+
     def save(self, instance) -> None:
         """Validate the current modifications in the database."""
         data = {}
         model_name = instance.__class__.__name__.lower()
         signal(f"before_{model_name}_save").send(instance, data=data)
         self.do_save(instance)
+        self.clear_identity_map()
         signal(f"after_{model_name}_save").send(instance, data=data)
 
     def do_save(self, instance) -> None:
@@ -181,11 +392,75 @@ class Backend:
         model_name = instance.__class__.__name__.lower()
         signal(f"before_{model_name}_delete").send(instance, data=data)
         self.do_delete(instance)
+        self.clear_identity_map()
         signal(f"after_{model_name}_delete").send(instance, data=data)
 
     def do_delete(self, instance) -> None:
         raise NotImplementedError()
 
+    def save_many(self, instances) -> None:
+        """Validate the modifications of several instances in the database.
+
+        The same signals than :meth:`~canaille.backends.Backend.save` are
+        sent for every instance, but backends supporting transactions
+        commit all the instances at once.
+        """
+        instances = list(instances)
+        datas = [{} for _ in instances]
+        for instance, data in zip(instances, datas, strict=True):
+            model_name = instance.__class__.__name__.lower()
+            signal(f"before_{model_name}_save").send(instance, data=data)
+        self.do_save_many(instances)
+        self.clear_identity_map()
+        for instance, data in zip(instances, datas, strict=True):
+            model_name = instance.__class__.__name__.lower()
+            signal(f"after_{model_name}_save").send(instance, data=data)
+
+    def do_save_many(self, instances) -> None:
+        for instance in instances:
+            self.do_save(instance)
+
+    def delete_many(self, instances) -> None:
+        """Remove several instances from the database.
+
+        The same signals than :meth:`~canaille.backends.Backend.delete` are
+        sent for every instance, but backends supporting transactions
+        commit all the deletions at once.
+        """
+        instances = list(instances)
+        datas = [{} for _ in instances]
+        for instance, data in zip(instances, datas, strict=True):
+            model_name = instance.__class__.__name__.lower()
+            signal(f"before_{model_name}_delete").send(instance, data=data)
+        self.do_delete_many(instances)
+        self.clear_identity_map()
+        for instance, data in zip(instances, datas, strict=True):
+            model_name = instance.__class__.__name__.lower()
+            signal(f"after_{model_name}_delete").send(instance, data=data)
+
+    def do_delete_many(self, instances) -> None:
+        for instance in instances:
+            self.do_delete(instance)
+
+    def purge_expired(
+        self, model, now=None, batch_size: int = 100, dry_run: bool = False
+    ) -> int:
+        """Remove the instances whose ``issue_date`` plus ``lifetime`` is before *now*.
+
+        Backends remove the expired instances without loading them, thus
+        the deletion signals are not sent. ``batch_size`` is the number of
+        instances removed at once by the backends that cannot remove them
+        all in a single operation. With ``dry_run``, nothing is removed.
+
+        :return: The number of expired instances.
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        self.clear_identity_map()
+        return self.do_purge_expired(model, now, batch_size=batch_size, dry_run=dry_run)
+
+    def do_purge_expired(self, model, now, batch_size=100, dry_run=False) -> int:
+        raise NotImplementedError()
+
     def reload(self, instance) -> None:
         """Cancel the unsaved modifications.
 
@@ -217,13 +492,17 @@ class Backend:
         return payload
 
     def do_dump(self, model: list[str] | None = None) -> dict:
+        """Return a mapping of model names and iterators over their instances.
+
+        The instances are lazily loaded, so the dump can be streamed.
+        """
         from canaille.app.models import MODELS
 
         payload = {}
         model_names = model or MODELS.keys()
         for model_name in model_names:
             model = MODELS[model_name]
-            payload[model_name] = list(self.query(model))
+            payload[model_name] = self.iter_query(model)
 
         return payload
 
@@ -233,6 +512,7 @@ class Backend:
         data = {}
         signal("before_restore").send(objects, data=data)
         self.do_restore(objects)
+        self.clear_identity_map()
         signal("after_restore").send(objects, data=data)
 
     @staticmethod
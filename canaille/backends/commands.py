@@ -115,8 +115,18 @@ def dump(model: list[str] | None):
     """
     check_models(model)
     payload = Backend.instance.dump(model)
-    output = json.dumps(payload, cls=Backend.instance.json_encoder)
-    click.echo(output)
+    encoder = Backend.instance.json_encoder()
+
+    # instances are streamed one by one, so the dump is never fully loaded in memory
+    click.echo("{", nl=False)
+    for index, (model_name, instances) in enumerate(payload.items()):
+        separator = ", " if index else ""
+        click.echo(f"{separator}{json.dumps(model_name)}: [", nl=False)
+        for instance_index, instance in enumerate(instances):
+            separator = ", " if instance_index else ""
+            click.echo(f"{separator}{encoder.encode(instance)}", nl=False)
+        click.echo("]", nl=False)
+    click.echo("}")
 
 
 @click.command()
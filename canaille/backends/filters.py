@@ -0,0 +1,123 @@
+"""Backend independent query filters.
+
+Filters are trees of comparisons that :meth:`~canaille.backends.Backend.query`
+and :meth:`~canaille.backends.Backend.count` accept as their ``where`` argument.
+Each backend translates them into its native query language, so the filtering
+happens where the data is stored:
+
+>>> where = And([Comparison("user_name", "sw", "j"), Not(Comparison("title", "pr"))])
+>>> backend.query(User, where=where)
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+OPERATORS = ("eq", "ne", "co", "sw", "ew", "gt", "ge", "lt", "le", "pr")
+"""The comparison operators, named after their :rfc:`SCIM <7644#section-3.4.2.2>` counterparts."""
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """Compare an attribute with a value.
+
+    Multi-valued attributes match when any of their values does. The ``pr``
+    operator takes no value and matches attributes that have a value.
+    """
+
+    attribute: str
+    operator: str
+    value: Any = None
+
+    def __post_init__(self):
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Unknown comparison operator '{self.operator}'")
+
+
+@dataclass(frozen=True)
+class And:
+    """Match the instances matching all the operands."""
+
+    operands: tuple
+
+    def __post_init__(self):
+        object.__setattr__(self, "operands", tuple(self.operands))
+
+
+@dataclass(frozen=True)
+class Or:
+    """Match the instances matching any of the operands."""
+
+    operands: tuple
+
+    def __post_init__(self):
+        object.__setattr__(self, "operands", tuple(self.operands))
+
+
+@dataclass(frozen=True)
+class Not:
+    """Match the instances that do not match the operand."""
+
+    operand: Any
+
+
+def comparisons(where):
+    """Yield the comparisons of a filter."""
+    if isinstance(where, Comparison):
+        yield where
+    elif isinstance(where, Not):
+        yield from comparisons(where.operand)
+    else:
+        for operand in where.operands:
+            yield from comparisons(operand)
+
+
+def matches(where, get_values) -> bool:
+    """Evaluate a filter in Python.
+
+    ``get_values`` returns the list of values of an attribute. Strings are
+    compared without case for the substring operators.
+    """
+    if isinstance(where, And):
+        return all(matches(operand, get_values) for operand in where.operands)
+
+    if isinstance(where, Or):
+        return any(matches(operand, get_values) for operand in where.operands)
+
+    if isinstance(where, Not):
+        return not matches(where.operand, get_values)
+
+    values = get_values(where.attribute)
+    if where.operator == "pr":
+        return bool(values)
+
+    if where.operator == "ne":
+        return not any(value == where.value for value in values)
+
+    return any(compare(value, where.operator, where.value) for value in values)
+
+
+def compare(value, operator, expected) -> bool:
+    if operator == "eq":
+        return value == expected
+
+    if operator in ("co", "sw", "ew"):
+        if not isinstance(value, str):
+            return False
+        value, expected = value.casefold(), str(expected).casefold()
+        if operator == "co":
+            return expected in value
+        if operator == "sw":
+            return value.startswith(expected)
+        return value.endswith(expected)
+
+    try:
+        if operator == "gt":
+            return value > expected
+        if operator == "ge":
+            return value >= expected
+        if operator == "lt":
+            return value < expected
+        return value <= expected
+
+    except TypeError:
+        return False
@@ -5,6 +5,8 @@ import uuid
 from contextlib import contextmanager
 
 from flask import current_app
+from flask import g
+from flask import has_app_context
 
 from canaille.app import models
 from canaille.app.configuration import CheckResult
@@ -17,11 +19,13 @@ from canaille.backends import get_lockout_delay_message
 from canaille.backends import is_meaningful_value
 from canaille.backends.models import Model
 
+from .engine import AsyncEngine
 from .engine import AuthenticationError
-from .engine import Engine
 from .engine import InsufficientAccessError
 from .engine import OperationalError
 from .engine import PasswordStatus
+from .engine import normalize_dn
+from .filter import build_where_filter
 from .utils import listify
 
 
@@ -62,7 +66,7 @@ class LDAPBackend(Backend):
     def __init__(self, config):
         super().__init__(config)
         ldap_config = self.config["CANAILLE_LDAP"]
-        self.engine = Engine(
+        self.engine = AsyncEngine(
             uri=ldap_config["URI"],
             bind_dn=ldap_config["BIND_DN"],
             bind_pw=ldap_config["BIND_PW"],
@@ -72,6 +76,7 @@ class LDAPBackend(Backend):
             pool_retry_max=ldap_config["POOL_RETRY_MAX"],
             pool_retry_delay=ldap_config["POOL_RETRY_DELAY"],
             timeout=ldap_config["TIMEOUT"],
+            page_size=ldap_config["PAGE_SIZE"],
         )
 
     def init_app(self, app, init_backend=None):
@@ -105,6 +110,11 @@ class LDAPBackend(Backend):
                         f"The user '{config['CANAILLE_LDAP']['BIND_DN']}' has insufficient permissions to install LDAP schemas."
                     ) from exc
 
+    def teardown(self) -> None:
+        super().teardown()
+        if has_app_context():
+            g.pop("ldap_references", None)
+
     @contextmanager
     def connection(self):
         """Get a connection from the pool."""
@@ -224,20 +234,57 @@ class LDAPBackend(Backend):
     def get_persisted_value(self, instance, attribute):
         if not instance.id:
             return []
-        stored = self.get(type(instance), instance.id)
+        stored = self.do_get(type(instance), instance.id)
         return getattr(stored, attribute, []) if stored else []
 
-    def do_query(self, model, *args, **kwargs):
-        return self.engine.query(model, *args, **kwargs)
+    def do_query(
+        self,
+        model,
+        *args,
+        offset=None,
+        limit=None,
+        order_by=None,
+        descending=False,
+        fields=None,
+        where=None,
+        **kwargs,
+    ):
+        return self.engine.query(
+            model,
+            *args,
+            offset=offset,
+            limit=limit,
+            order_by=order_by,
+            descending=descending,
+            fields=fields,
+            filter=build_where_filter(model, where) if where is not None else None,
+            **kwargs,
+        )
+
+    def do_iter_query(self, model, batch_size=100, fields=None, **kwargs):
+        return self.engine.iter_query(
+            model, batch_size=batch_size, fields=fields, **kwargs
+        )
+
+    def do_count(self, model, *args, where=None, **kwargs):
+        return self.engine.count(
+            model,
+            *args,
+            filter=build_where_filter(model, where) if where is not None else None,
+            **kwargs,
+        )
+
+    def do_exists(self, model, **kwargs):
+        return self.engine.exists(model, **kwargs)
 
-    def do_count(self, model, *args, **kwargs):
-        return self.engine.count(model, *args, **kwargs)
+    def do_first(self, model, fields=None, **kwargs):
+        return self.engine.first(model, fields=fields, **kwargs)
 
     def fuzzy(self, model, query, attributes=None, **kwargs):
         return self.engine.fuzzy(model, query, attributes, **kwargs)
 
-    def get(self, model, identifier=None, /, **kwargs):
-        return self.engine.get(model, identifier, **kwargs)
+    def do_get(self, model, identifier=None, /, fields=None, **kwargs):
+        return self.engine.get(model, identifier, fields=fields, **kwargs)
 
     def do_restore(self, payload):
         # Canaille exports uuids but LDAP uuids are read-only
@@ -252,6 +299,7 @@ class LDAPBackend(Backend):
         # so it has to be created first, and then must be added to its own audience.
         for model_name, model in MODELS.items():
             states = payload.get(model_name, [])
+            objs = []
             for state in states:
                 filtered_state = self.filter_state(
                     model, state, keep_non_model_and_required_attrs=True
@@ -259,13 +307,15 @@ class LDAPBackend(Backend):
                 filtered_state = self.replace_uuids_with_dns(
                     model, filtered_state, uuids_dn
                 )
-                obj = model(**filtered_state)
-                Backend.instance.save(obj)
+                objs.append(model(**filtered_state))
+            Backend.instance.save_many(objs)
+            for state, obj in zip(states, objs, strict=True):
                 uuids_dn[state["id"]] = obj.dn
 
         # Insert attributes that are model references
         for model_name, model in MODELS.items():
             states = payload.get(model_name, [])
+            objs = []
             for state in states:
                 obj_dn = uuids_dn[state["id"]]
                 filtered_state = self.filter_state(
@@ -279,7 +329,8 @@ class LDAPBackend(Backend):
                 obj = Backend.instance.get(model, obj_dn)
                 for attr, value in filtered_state.items():
                     setattr(obj, attr, value)
-                Backend.instance.save(obj)
+                objs.append(obj)
+            Backend.instance.save_many(objs)
 
     @classmethod
     def filter_state(cls, model, state, keep_non_model_and_required_attrs):
@@ -315,11 +366,39 @@ class LDAPBackend(Backend):
 
         return {attr: replace_attr(attr, value) for attr, value in state.items()}
 
+    def references(self):
+        """Map the DNs dereferenced during the current request with their instances."""
+        if not has_app_context():
+            return {}
+
+        return g.setdefault("ldap_references", {})
+
+    def dereference(self, dns):
+        """Return the instances matching a list of DNs, or :py:data:`None` for missing DNs.
+
+        The DNs that have not already been dereferenced during the current
+        request are fetched at once.
+        """
+        from .ldapobject import LDAPObject
+
+        references = self.references()
+        missing = {normalize_dn(dn) for dn in dns} - references.keys()
+        if missing:
+            references.update(self.engine.get_many(LDAPObject, missing))
+        return [references.get(normalize_dn(dn)) for dn in dns]
+
     def do_save(self, instance) -> None:
         self.engine.save(instance)
+        self.references().pop(normalize_dn(instance.dn), None)
 
     def do_delete(self, instance) -> None:
         self.engine.delete(instance)
+        self.references().pop(normalize_dn(instance.dn), None)
+
+    def do_purge_expired(self, model, now, batch_size=100, dry_run=False) -> int:
+        return self.engine.purge_expired(
+            model, now, batch_size=batch_size, dry_run=dry_run
+        )
 
     def do_reload(self, instance) -> None:
         self.engine.reload(instance)
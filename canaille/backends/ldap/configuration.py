@@ -78,3 +78,10 @@ class LDAPSettings(BaseModel):
 
     See the ``retry_delay`` parameter of :class:`ldappool.ConnectionManager`.
     """
+
+    PAGE_SIZE: int = 500
+    """The maximum number of entries the LDAP server sends at once.
+
+    Paginated and sorted searches use the Simple Paged Results control,
+    and fetch the results by pages of this size.
+    """
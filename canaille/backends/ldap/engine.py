@@ -1,13 +1,22 @@
+import asyncio
+import datetime
+import itertools
+from contextlib import asynccontextmanager
+from contextlib import closing
 from contextlib import contextmanager
 from enum import Enum
 
 import ldap
+import ldap.dn
+import ldap.filter
 import ldap.modlist
 import ldif
 from ldap.controls import DecodeControlTuples
+from ldap.controls import SimplePagedResultsControl
 from ldap.controls.ppolicy import PasswordPolicyControl
 from ldap.controls.ppolicy import PasswordPolicyError
 from ldap.controls.readentry import PostReadControl
+from ldap.controls.sss import SSSRequestControl
 from ldappool import ConnectionManager
 from ldappool import StateConnector
 
@@ -41,6 +50,11 @@ class NoSuchObjectError(LDAPAlchemyError):
     """The requested LDAP object does not exist."""
 
 
+def normalize_dn(dn):
+    """Return a canonical form of a DN, so equivalent DNs compare equal."""
+    return ldap.dn.dn2str(ldap.dn.str2dn(dn.lower()))
+
+
 @contextmanager
 def _wrap_ldap_errors():
     try:
@@ -97,12 +111,14 @@ class Engine:
         pool_retry_max=3,
         pool_retry_delay=0.1,
         timeout=-1,
+        page_size=500,
     ):
         self.uri = uri
         self.bind_dn = bind_dn
         self.bind_pw = bind_pw
         self.root_dn = root_dn
         self.timeout = timeout
+        self.page_size = page_size
         self.pool = ConnectionManager(
             uri=uri,
             bind=bind_dn,
@@ -189,6 +205,9 @@ class Engine:
         """
         from .ldapobject import LDAPObject
 
+        if instance.exists and instance._partial:
+            self.load(instance)
+
         current_object_classes = instance.get_ldap_attribute("objectClass") or []
         instance.set_ldap_attribute(
             "objectClass",
@@ -249,6 +268,7 @@ class Engine:
         instance.exists = True
         instance._stored = {**result.entry, **instance._dirty}
         instance._dirty = {}
+        instance._partial = False
 
     def delete(self, instance):
         """Delete an LDAPObject instance from the directory.
@@ -262,16 +282,163 @@ class Engine:
             pass
 
     def reload(self, instance):
-        """Reload an LDAPObject instance state from the directory."""
+        """Reload an LDAPObject instance state from the directory.
+
+        Partially loaded instances only reload their loaded attributes.
+        """
+        attrlist = list(instance._stored) if instance._partial else ["+", "*"]
         with self.connection() as conn:
-            result = conn.search_s(instance.dn, ldap.SCOPE_SUBTREE, None, ["+", "*"])
+            result = conn.search_s(instance.dn, ldap.SCOPE_BASE, None, attrlist)
         instance._dirty = {}
         instance._stored = result[0][1]
 
-    def query(self, model, dn=None, filter=None, **kwargs):
+    def load(self, instance):
+        """Load the attributes a partially loaded instance is missing."""
+        with self.connection() as conn:
+            result = conn.search_s(instance.dn, ldap.SCOPE_BASE, None, ["+", "*"])
+        for name, values in result[0][1].items():
+            instance._stored.setdefault(name, values)
+        instance._partial = False
+
+    @staticmethod
+    def attrlist(model, fields=None):
+        """Map Python attributes to the list of LDAP attributes to request.
+
+        The object classes, the RDN attribute and the id are always requested,
+        as they are needed to build and identify the instances.
+        """
+        if not fields:
+            return ["+", "*"]
+
+        names = {model.python_attribute_to_ldap(name) for name in ["id", *fields]}
+        return sorted({"objectClass", model.rdn_attribute, *names} - {None})
+
+    def _paged_search(self, conn, base, ldapfilter, attrlist, page_size, serverctrls):
+        """Iterate over search results, fetched page per page.
+
+        Uses the Simple Paged Results control (:rfc:`2696`) so the
+        server only sends ``page_size`` entries at a time. When the
+        iteration is interrupted, the search is abandoned on the server.
+        """
+        page_control = SimplePagedResultsControl(True, size=page_size, cookie="")
+        cookie = ""
+        try:
+            while True:
+                msgid = conn.search_ext(
+                    base,
+                    ldap.SCOPE_SUBTREE,
+                    ldapfilter,
+                    attrlist,
+                    serverctrls=serverctrls + [page_control],
+                )
+                _, results, _, controls = conn.result3(msgid)
+                cookie = next(
+                    (
+                        control.cookie
+                        for control in controls
+                        if control.controlType == SimplePagedResultsControl.controlType
+                    ),
+                    "",
+                )
+                yield from results
+                if not cookie:
+                    return
+                page_control.cookie = cookie
+
+        finally:
+            if cookie:
+                page_control.size = 0
+                page_control.cookie = cookie
+                conn.search_ext_s(
+                    base,
+                    ldap.SCOPE_SUBTREE,
+                    ldapfilter,
+                    ["1.1"],
+                    serverctrls=serverctrls + [page_control],
+                )
+
+    def _search_page(
+        self, model, base, ldapfilter, attrlist, offset, limit, order_by, descending
+    ):
+        """Search a sorted slice of the entries matching a filter.
+
+        Sorting is delegated to the server with the Server Side Sorting
+        control (:rfc:`2891`). If the server does not support it, the
+        entries are sorted by the client.
+        """
+        start = offset or 0
+        stop = start + limit if limit is not None else None
+        page_size = min(stop, self.page_size) if stop else self.page_size
+        ldap_order_by = model.python_attribute_to_ldap(order_by) if order_by else None
+        serverctrls = (
+            [
+                SSSRequestControl(
+                    criticality=True,
+                    ordering_rules=[
+                        f"-{ldap_order_by}" if descending else ldap_order_by
+                    ],
+                )
+            ]
+            if ldap_order_by
+            else []
+        )
+
+        with self.connection() as conn:
+            try:
+                with closing(
+                    self._paged_search(
+                        conn, base, ldapfilter, attrlist, page_size, serverctrls
+                    )
+                ) as results:
+                    return list(itertools.islice(results, start, stop))
+
+            except ldap.UNAVAILABLE_CRITICAL_EXTENSION:
+                results = conn.search_s(base, ldap.SCOPE_SUBTREE, ldapfilter, attrlist)
+
+        return self._sort_entries(model, results, order_by, descending)[start:stop]
+
+    @staticmethod
+    def _sort_entries(model, results, order_by, descending):
+        """Sort entries on a Python attribute, for servers without sorting support.
+
+        Values are decoded by the model and strings are compared without
+        case, like the default LDAP ordering rules. Ties are broken on the
+        entry ids, and entries without value are sorted last.
+        """
+
+        def sort_value(entry):
+            value = getattr(LDAPObjectQuery(model, [entry])[0], order_by)
+            return value.casefold() if isinstance(value, str) else value
+
+        def entry_id(entry):
+            return LDAPObjectQuery(model, [entry])[0].id or ""
+
+        present = [entry for entry in results if sort_value(entry) is not None]
+        missing = [entry for entry in results if sort_value(entry) is None]
+        present.sort(
+            key=lambda entry: (sort_value(entry), entry_id(entry)), reverse=descending
+        )
+        missing.sort(key=entry_id, reverse=descending)
+        return present + missing
+
+    def query(
+        self,
+        model,
+        dn=None,
+        filter=None,
+        offset=None,
+        limit=None,
+        order_by=None,
+        descending=False,
+        fields=None,
+        **kwargs,
+    ):
         """Query the directory for entries matching the given model and filters.
 
         Returns an empty collection if the base DN does not exist.
+        When ``offset``, ``limit`` or ``order_by`` are passed, only the
+        requested slice of the results is fetched. When ``fields`` are
+        passed, only the matching LDAP attributes are requested.
         """
         base = resolve_base_dn(model, dn)
         ldapfilter = build_search_filter(
@@ -279,12 +446,155 @@ class Engine:
             build_attribute_filter(model, **kwargs),
             filter or "",
         )
+        if limit == 0:
+            return LDAPObjectQuery(model, [])
+
+        # the sort fallback needs the sorted attribute
+        if fields and order_by:
+            fields = [*fields, order_by]
+        attrlist = self.attrlist(model, fields)
+
         try:
-            with self.connection() as conn:
-                result = conn.search_s(base, ldap.SCOPE_SUBTREE, ldapfilter, ["+", "*"])
+            if offset is None and limit is None and not order_by:
+                with self.connection() as conn:
+                    result = conn.search_s(
+                        base, ldap.SCOPE_SUBTREE, ldapfilter, attrlist
+                    )
+            else:
+                result = self._search_page(
+                    model,
+                    base,
+                    ldapfilter,
+                    attrlist,
+                    offset,
+                    limit,
+                    order_by,
+                    descending,
+                )
         except NoSuchObjectError:
             result = []
-        return LDAPObjectQuery(model, result)
+        return LDAPObjectQuery(model, result, partial=bool(fields))
+
+    def iter_query(
+        self, model, dn=None, filter=None, batch_size=100, fields=None, **kwargs
+    ):
+        """Lazily yield the entries matching the given model and filters.
+
+        The entries are fetched by pages of ``batch_size`` with the Simple
+        Paged Results control, on a single pooled connection that is held
+        until the iteration ends.
+        """
+        base = resolve_base_dn(model, dn)
+        ldapfilter = build_search_filter(
+            build_class_filter(model.ldap_object_class),
+            build_attribute_filter(model, **kwargs),
+            filter or "",
+        )
+        try:
+            with self.connection() as conn:
+                with closing(
+                    self._paged_search(
+                        conn,
+                        base,
+                        ldapfilter,
+                        self.attrlist(model, fields),
+                        batch_size,
+                        [],
+                    )
+                ) as results:
+                    query = LDAPObjectQuery(model, [], partial=bool(fields))
+                    for _, entry in results:
+                        yield query.decorate(entry)
+        except NoSuchObjectError:
+            return
+
+    def purge_expired(self, model, now, batch_size=100, dry_run=False):
+        """Delete the entries whose issue date plus lifetime is before *now*.
+
+        LDAP filters cannot add the lifetime to the issue date, so the
+        server only returns the entries issued before *now*, with the two
+        attributes needed to compute their expiration. The deletion
+        requests are then sent by batches of ``batch_size`` on a single
+        connection, without waiting for each answer.
+        """
+        issue_date_attribute = model.python_attribute_to_ldap("issue_date")
+        lifetime_attribute = model.python_attribute_to_ldap("lifetime")
+        utc_now = now.astimezone(datetime.timezone.utc)
+        base = resolve_base_dn(model)
+        ldapfilter = build_search_filter(
+            build_class_filter(model.ldap_object_class),
+            f"({issue_date_attribute}<={utc_now.strftime('%Y%m%d%H%M%S.%fZ')})",
+        )
+
+        expired_dns = []
+        try:
+            with self.connection() as conn:
+                with closing(
+                    self._paged_search(
+                        conn,
+                        base,
+                        ldapfilter,
+                        ["objectClass", issue_date_attribute, lifetime_attribute],
+                        self.page_size,
+                        [],
+                    )
+                ) as results:
+                    query = LDAPObjectQuery(model, [])
+                    for dn, entry in results:
+                        instance = query.decorate(entry)
+                        expiration = instance.issue_date + datetime.timedelta(
+                            seconds=instance.lifetime or 0
+                        )
+                        if expiration < now:
+                            expired_dns.append(dn)
+        except NoSuchObjectError:
+            return 0
+
+        if dry_run:
+            return len(expired_dns)
+
+        for start in range(0, len(expired_dns), batch_size):
+            with self.connection() as conn:
+                msgids = [
+                    conn.delete(dn) for dn in expired_dns[start : start + batch_size]
+                ]
+                for msgid in msgids:
+                    try:
+                        conn.result(msgid)
+                    except ldap.NO_SUCH_OBJECT:
+                        pass
+
+        return len(expired_dns)
+
+    def get_many(self, model, dns, chunk_size=100):
+        """Fetch several entries by their DN with as few searches as possible.
+
+        The DNs are looked up by chunks of ``chunk_size`` with a filter on
+        the ``entryDN`` operational attribute.
+
+        :return: A dict associating the normalized DNs with the instances,
+            or with :py:data:`None` for the DNs that do not exist.
+        """
+        dns = list(dns)
+        instances = dict.fromkeys((normalize_dn(dn) for dn in dns), None)
+        for start in range(0, len(dns), chunk_size):
+            ldapfilter = "(|{})".format(
+                "".join(
+                    f"(entryDN={ldap.filter.escape_filter_chars(dn)})"
+                    for dn in dns[start : start + chunk_size]
+                )
+            )
+            with self.connection() as conn:
+                results = conn.search_s(
+                    self.root_dn, ldap.SCOPE_SUBTREE, ldapfilter, ["+", "*"]
+                )
+            # skip the search references
+            results = [(dn, entry) for dn, entry in results if dn]
+            query = LDAPObjectQuery(model, results)
+            for (dn, _), instance in zip(results, query, strict=True):
+                instances[normalize_dn(dn)] = instance
+
+        return instances
 
     def count(self, model, dn=None, filter=None, **kwargs):
         """Count entries matching the given model and filters without loading attributes."""
@@ -301,19 +611,82 @@ class Engine:
             result = []
         return len(result)
 
-    def get(self, model, identifier=None, /, **kwargs):
-        """Return a single entry matching the criteria, or ``None``."""
+    def exists(self, model, dn=None, filter=None, **kwargs):
+        """Indicate whether an entry matches the given model and filters.
+
+        The search requests no attribute and stops at the first entry.
+        """
+        base = resolve_base_dn(model, dn)
+        ldapfilter = build_search_filter(
+            build_class_filter(model.ldap_object_class),
+            build_attribute_filter(model, **kwargs),
+            filter or "",
+        )
         try:
-            return self.query(model, identifier, **kwargs)[0]
-        except (IndexError, NoSuchObjectError):
-            if identifier and model.base:
-                return (
-                    self.get(model, **{model.identifier_attribute: identifier})
-                    or self.get(model, id=identifier)
-                    or None
+            with self.connection() as conn:
+                result = conn.search_ext_s(
+                    base, ldap.SCOPE_SUBTREE, ldapfilter, ["1.1"], sizelimit=1
                 )
+        except ldap.SIZELIMIT_EXCEEDED:
+            return True
+        except NoSuchObjectError:
+            return False
+        return bool(result)
+
+    def first(self, model, dn=None, filter=None, fields=None, **kwargs):
+        """Return the first entry matching the given model and filters, or ``None``.
+
+        The search stops at the first entry. When it exceeds the size limit,
+        the server sends the entry before the error, so the results are read
+        one by one.
+        """
+        base = resolve_base_dn(model, dn)
+        ldapfilter = build_search_filter(
+            build_class_filter(model.ldap_object_class),
+            build_attribute_filter(model, **kwargs),
+            filter or "",
+        )
+        result = []
+        try:
+            with self.connection() as conn:
+                msgid = conn.search_ext(
+                    base,
+                    ldap.SCOPE_SUBTREE,
+                    ldapfilter,
+                    self.attrlist(model, fields),
+                    sizelimit=1,
+                )
+                try:
+                    result_type = None
+                    while result_type != ldap.RES_SEARCH_RESULT:
+                        result_type, entries, _, _ = conn.result3(msgid, all=0)
+                        if result_type == ldap.RES_SEARCH_ENTRY:
+                            result.extend(entries)
+                except ldap.SIZELIMIT_EXCEEDED:
+                    pass
+        except NoSuchObjectError:
             return None
 
+        if not result:
+            return None
+
+        return LDAPObjectQuery(model, result[:1], partial=bool(fields))[0]
+
+    def get(self, model, identifier=None, /, fields=None, **kwargs):
+        """Return a single entry matching the criteria, or ``None``."""
+        instance = self.first(model, identifier, fields=fields, **kwargs)
+        if instance is None and identifier and model.base:
+            return (
+                self.get(
+                    model,
+                    fields=fields,
+                    **{model.identifier_attribute: identifier},
+                )
+                or self.get(model, fields=fields, id=identifier)
+                or None
+            )
+        return instance
+
     def match_filter(self, dn, filter_str):
         """Check if an LDAP entry matches a filter string."""
         with self.connection() as conn:
@@ -325,3 +698,140 @@ class Engine:
         ldap_attributes = [model.python_attribute_to_ldap(name) for name in attributes]
         filter = build_fuzzy_filter(query, ldap_attributes)
         return self.query(model, filter=filter, **kwargs)
+
+
+class Pipeline:
+    """Awaitable LDAP operations pipelined on a single connection.
+
+    Each operation sends its request with the asynchronous python-ldap API
+    as soon as it is scheduled, without waiting for the previous answers.
+    The results are read when the connection socket becomes readable, so
+    the event loop is never blocked by a round-trip.
+    """
+
+    def __init__(self, engine, conn):
+        self.engine = engine
+        self.conn = conn
+        self.pending = {}
+        self.loop = asyncio.get_running_loop()
+        self.fileno = conn.fileno()
+
+    def _read(self):
+        """Poll the pending requests, and resolve the complete ones."""
+        for msgid, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[msgid]
+                continue
+
+            try:
+                result = self.conn.result3(msgid, all=1, timeout=0)
+            except ldap.LDAPError as exc:
+                del self.pending[msgid]
+                future.set_exception(exc)
+                continue
+
+            if result[0] is not None:
+                del self.pending[msgid]
+                future.set_result(result)
+
+        if not self.pending:
+            self.loop.remove_reader(self.fileno)
+
+    async def result(self, msgid):
+        """Wait for the complete answer to a request."""
+        future = self.loop.create_future()
+        if not self.pending:
+            self.loop.add_reader(self.fileno, self._read)
+        self.pending[msgid] = future
+        # the answer may already have been buffered while reading another one
+        self.loop.call_soon(self._read)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.conn.abandon(msgid)
+            raise
+
+    async def search(self, base, scope, ldapfilter, attrlist):
+        """Search the directory, and return the entries without the references."""
+        with _wrap_ldap_errors():
+            msgid = self.conn.search_ext(base, scope, ldapfilter, attrlist)
+            _, results, _, _ = await self.result(msgid)
+        return [(dn, entry) for dn, entry in results if dn]
+
+    async def query(self, model, dn=None, filter=None, fields=None, **kwargs):
+        """Awaitable version of :meth:`Engine.query`, without pagination."""
+        base = resolve_base_dn(model, dn)
+        ldapfilter = build_search_filter(
+            build_class_filter(model.ldap_object_class),
+            build_attribute_filter(model, **kwargs),
+            filter or "",
+        )
+        try:
+            result = await self.search(
+                base,
+                ldap.SCOPE_SUBTREE,
+                ldapfilter,
+                self.engine.attrlist(model, fields),
+            )
+        except NoSuchObjectError:
+            result = []
+        return LDAPObjectQuery(model, result, partial=bool(fields))
+
+    async def get(self, model, identifier=None, /, fields=None, **kwargs):
+        """Awaitable version of :meth:`Engine.get`."""
+        try:
+            return (await self.query(model, identifier, fields=fields, **kwargs))[0]
+        except IndexError:
+            pass
+
+        if identifier and model.base:
+            return (
+                await self.get(
+                    model, fields=fields, **{model.identifier_attribute: identifier}
+                )
+                or await self.get(model, fields=fields, id=identifier)
+                or None
+            )
+        return None
+
+    async def count(self, model, dn=None, filter=None, **kwargs):
+        """Awaitable version of :meth:`Engine.count`."""
+        base = resolve_base_dn(model, dn)
+        ldapfilter = build_search_filter(
+            build_class_filter(model.ldap_object_class),
+            build_attribute_filter(model, **kwargs),
+            filter or "",
+        )
+        try:
+            result = await self.search(base, ldap.SCOPE_SUBTREE, ldapfilter, ["1.1"])
+        except NoSuchObjectError:
+            result = []
+        return len(result)
+
+
+class AsyncEngine(Engine):
+    """LDAP engine that additionally exposes awaitable operations.
+
+    The synchronous API of :class:`Engine` is unchanged. Awaitable
+    operations are made through a :class:`Pipeline`, so independent
+    lookups can be awaited concurrently on one pooled connection::
+
+        async with engine.pipeline() as pipeline:
+            groups, consents = await asyncio.gather(
+                pipeline.query(models.Group, members=user),
+                pipeline.query(models.Consent, subject=user),
+            )
+    """
+
+    @asynccontextmanager
+    async def pipeline(self):
+        """Borrow a connection from the pool for the pipelined operations."""
+        with self.connection() as conn:
+            pipeline = Pipeline(self, conn)
+            try:
+                yield pipeline
+            finally:
+                for msgid in list(pipeline.pending):
+                    conn.abandon(msgid)
+                pipeline.pending.clear()
+                pipeline.loop.remove_reader(pipeline.fileno)
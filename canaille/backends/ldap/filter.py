@@ -1,6 +1,11 @@
 import ldap.dn
 import ldap.filter
 
+from canaille.backends.filters import And
+from canaille.backends.filters import Comparison
+from canaille.backends.filters import Not
+from canaille.backends.filters import Or
+
 from .utils import python_attrs_to_ldap
 
 
@@ -36,6 +41,48 @@ def build_attribute_filter(model, **kwargs):
     return "".join(parts)
 
 
+def build_where_filter(model, where):
+    """Build an LDAP filter from a :mod:`~canaille.backends.filters` tree."""
+    if isinstance(where, And):
+        return (
+            "(&" + "".join(build_where_filter(model, o) for o in where.operands) + ")"
+        )
+
+    if isinstance(where, Or):
+        return (
+            "(|" + "".join(build_where_filter(model, o) for o in where.operands) + ")"
+        )
+
+    if isinstance(where, Not):
+        return f"(!{build_where_filter(model, where.operand)})"
+
+    if where.operator == "eq":
+        return build_attribute_filter(model, **{where.attribute: where.value}) or (
+            f"(!({model.python_attribute_to_ldap(where.attribute)}=*))"
+        )
+
+    if where.operator == "ne":
+        return build_where_filter(
+            model, Not(Comparison(where.attribute, "eq", where.value))
+        )
+
+    key = model.python_attribute_to_ldap(where.attribute)
+    if where.operator == "pr":
+        return f"({key}=*)"
+
+    [value] = python_attrs_to_ldap({key: where.value}, encode=False)[key]
+    value = ldap.filter.escape_filter_chars(value)
+    return {
+        "co": f"({key}=*{value}*)",
+        "sw": f"({key}={value}*)",
+        "ew": f"({key}=*{value})",
+        "ge": f"({key}>={value})",
+        "le": f"({key}<={value})",
+        "gt": f"(&({key}>={value})(!({key}={value})))",
+        "lt": f"(&({key}<={value})(!({key}={value})))",
+    }[where.operator]
+
+
 def build_fuzzy_filter(query, attributes):
     """Build an LDAP substring filter for fuzzy matching."""
     escaped = ldap.filter.escape_filter_chars(query)
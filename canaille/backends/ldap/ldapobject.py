@@ -7,6 +7,7 @@ import ldap.filter
 from canaille.backends.models import BackendModel
 
 from .backend import LDAPBackend
+from .utils import Syntax
 from .utils import attribute_ldap_syntax
 from .utils import cardinalize_attribute
 from .utils import ldap_to_python
@@ -44,6 +45,8 @@ class LDAPObject(BackendModel, metaclass=LDAPObjectMetaclass):
     def __init__(self, dn=None, **kwargs):
         self._stored = {}
         self._dirty = {}
+        self._query = None
+        self._partial = False
         self.exists = False
 
         for name, value in kwargs.items():
@@ -86,18 +89,57 @@ class LDAPObject(BackendModel, metaclass=LDAPObjectMetaclass):
         if name in self._dirty and lookup_changes:
             return self._dirty[name]
 
+        # Lazy loading of the attributes that were not requested
+        if lookup_state and self._partial and name not in self._stored:
+            LDAPBackend.instance.engine.load(self)
+
         if not self._stored.get(name) or not lookup_state:
             return None
 
         # Lazy conversion from ldap format to python format
         if any(isinstance(value, bytes) for value in self._stored[name]):
             syntax = attribute_ldap_syntax(name)
-            self._stored[name] = [
-                ldap_to_python(value, syntax) for value in self._stored[name]
-            ]
+            if syntax == Syntax.DISTINGUISHED_NAME:
+                self.dereference(name)
+            else:
+                self._stored[name] = [
+                    ldap_to_python(value, syntax) for value in self._stored[name]
+                ]
 
         return self._stored.get(name)
 
+    def dereference(self, name):
+        """Replace the DNs of an attribute by the instances they refer to.
+
+        The DNs are resolved at once for every entry of the query the
+        instance comes from, so iterating over the results costs a single
+        search per attribute instead of one search per reference.
+        """
+        states = [self._stored]
+        if self._query:
+            states += [
+                state for _, state in self._query.items if state is not self._stored
+            ]
+        states = [
+            state
+            for state in states
+            if any(isinstance(value, bytes) for value in state.get(name, []))
+        ]
+        dns = list(
+            {
+                value.decode("utf-8")
+                for state in states
+                for value in state[name]
+                if isinstance(value, bytes)
+            }
+        )
+        instances = dict(zip(dns, LDAPBackend.instance.dereference(dns), strict=True))
+        for state in states:
+            state[name] = [
+                instances[value.decode("utf-8")] if isinstance(value, bytes) else value
+                for value in state[name]
+            ]
+
     def set_ldap_attribute(self, name, value) -> None:
         if name not in self.ldap_object_attributes():
             return
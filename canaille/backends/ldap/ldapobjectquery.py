@@ -3,9 +3,10 @@ from collections.abc import Iterable
 
 
 class LDAPObjectQuery:
-    def __init__(self, klass, items):
+    def __init__(self, klass, items, partial=False):
         self.klass = klass
         self.items = items
+        self.partial = partial
 
     def __len__(self) -> int:
         return len(self.items)
@@ -36,6 +37,8 @@ class LDAPObjectQuery:
         klass = self.guess_class(self.klass, args["objectClass"])
         obj = klass()
         obj._stored = args
+        obj._query = self
+        obj._partial = self.partial
         obj.exists = True
         return obj
 
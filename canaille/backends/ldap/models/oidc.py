@@ -103,6 +103,7 @@ class Token(canaille.oidc.models.Token, LDAPObject):
         "last_modified": "modifyTimestamp",
         "token_id": "oauthTokenID",
         "access_token": "oauthAccessToken",
+        "access_token_digest": "oauthAccessTokenDigest",
         "client": "oauthClient",
         "subject": "oauthSubject",
         "type": "oauthTokenType",
@@ -1,3 +1,4 @@
+import bisect
 import copy
 import datetime
 import uuid
@@ -9,6 +10,10 @@ from canaille.app.configuration import CheckResult
 from canaille.app.models import MODELS
 from canaille.backends import Backend
 from canaille.backends import get_lockout_delay_message
+from canaille.backends.filters import And
+from canaille.backends.filters import Not
+from canaille.backends.filters import Or
+from canaille.backends.filters import matches
 
 
 def listify(value) -> list:
@@ -25,6 +30,9 @@ class MemoryBackend(Backend):
     attribute_indexes = None
     """Associates attribute values and ids."""
 
+    expiry_indexes = None
+    """Sorted lists of expiration dates and ids, for models having a lifetime."""
+
     def index(self, model):
         if not self.indexes:
             self.indexes = {}
@@ -41,6 +49,24 @@ class MemoryBackend(Backend):
             attribute, {}
         )
 
+    def expiry_index(self, model):
+        if not self.expiry_indexes:
+            self.expiry_indexes = {}
+
+        model_name = model if isinstance(model, str) else model.__name__
+        return self.expiry_indexes.setdefault(model_name, [])
+
+    @staticmethod
+    def expiry_key(model, state):
+        if "lifetime" not in model.attributes or not state.get("issue_date"):
+            return None
+
+        issue_date = state["issue_date"]
+        if not issue_date.tzinfo:
+            issue_date = issue_date.replace(tzinfo=datetime.timezone.utc)
+        expiration = issue_date + datetime.timedelta(seconds=state.get("lifetime") or 0)
+        return (expiration, state["id"])
+
     @classmethod
     def install(cls, app) -> None:
         pass
@@ -48,9 +74,6 @@ class MemoryBackend(Backend):
     def setup(self) -> None:
         pass
 
-    def teardown(self) -> None:
-        pass
-
     @classmethod
     def check_network_config(cls, config):
         return CheckResult(message="Memory backend don't need configuration")
@@ -97,14 +120,57 @@ class MemoryBackend(Backend):
     def get_persisted_value(self, instance, attribute):
         if not instance.id:
             return []
-        stored = self.get(type(instance), instance.id)
+        stored = self.do_get(type(instance), instance.id)
         return getattr(stored, attribute, []) if stored else []
 
-    def do_query(self, model, *args, **kwargs):
+    def do_query(
+        self,
+        model,
+        *args,
+        offset=None,
+        limit=None,
+        order_by=None,
+        descending=False,
+        fields=None,
+        where=None,
+        **kwargs,
+    ):
+        # every attribute is already in memory, so fields are ignored
+        states = self.sort_and_slice(
+            self.filter_states(model, where=where, **kwargs),
+            offset,
+            limit,
+            order_by,
+            descending,
+        )
+        return self.build_instances(model, states)
+
+    def do_iter_query(self, model, batch_size=100, fields=None, **kwargs):
+        # only the ids are collected upfront, the states are walked by chunks
+        ids = sorted(state["id"] for state in self.filter_states(model, **kwargs))
+        for start in range(0, len(ids), batch_size):
+            states = [
+                self.index(model)[id]
+                for id in ids[start : start + batch_size]
+                if id in self.index(model)
+            ]
+            yield from self.build_instances(model, states)
+
+    def filter_states(self, model, where=None, **kwargs):
+        if where is not None:
+            ids = self.where_ids(model, where)
+            if not kwargs:
+                return [self.index(model)[id] for id in ids]
+
+            return [
+                state
+                for state in self.filter_states(model, **kwargs)
+                if state["id"] in ids
+            ]
+
         # if there is no filter, return all models
         if not kwargs:
-            states = self.index(model).values()
-            return [model(**state) for state in states]
+            return list(self.index(model).values())
 
         # get the ids from the attribute indexes
         ids = {
@@ -115,9 +181,49 @@ class MemoryBackend(Backend):
         }
 
         # get the states from the ids
-        states = [self.index(model)[id] for id in ids]
+        return [self.index(model)[id] for id in ids]
+
+    def where_ids(self, model, where):
+        """Compute the ids of the instances matching a filter.
+
+        Equality comparisons are read from the attribute indexes, the other
+        comparisons walk through the instances.
+        """
+        if isinstance(where, And):
+            ids = None
+            for operand in where.operands:
+                operand_ids = self.where_ids(model, operand)
+                ids = operand_ids if ids is None else ids & operand_ids
+                if not ids:
+                    break
+            return ids or set()
+
+        if isinstance(where, Or):
+            return set().union(
+                *(self.where_ids(model, operand) for operand in where.operands)
+            )
+
+        if isinstance(where, Not):
+            return set(self.index(model)) - self.where_ids(model, where.operand)
+
+        if where.operator == "eq":
+            index = self.attribute_index(model, where.attribute)
+            return {
+                id
+                for value in model.serialize(listify(where.value))
+                for id in index.get(value, [])
+            }
+
+        return {
+            id
+            for id, state in self.index(model).items()
+            if matches(
+                where, lambda attribute, state=state: listify(state.get(attribute))
+            )
+        }
 
-        # initialize instances from the states
+    @staticmethod
+    def build_instances(model, states):
         instances = [model(**state) for state in states]
         for instance in instances:
             # TODO: maybe find a way to not initialize the cache in the first place?
@@ -125,10 +231,60 @@ class MemoryBackend(Backend):
 
         return instances
 
-    def do_count(self, model, *args, **kwargs):
-        if not kwargs:
+    @staticmethod
+    def sort_and_slice(states, offset, limit, order_by, descending):
+        """Sort states on an attribute and keep only the requested page.
+
+        The slicing happens on the raw states, so only the instances of
+        the page are built. Missing values are sorted last, and ties are
+        broken on the ids.
+        """
+        if order_by or offset or limit is not None:
+            present = [state for state in states if state.get(order_by) is not None]
+            missing = [state for state in states if state.get(order_by) is None]
+            states = sorted(
+                present,
+                key=lambda state: (state[order_by], state["id"]),
+                reverse=descending,
+            ) + sorted(missing, key=lambda state: state["id"], reverse=descending)
+
+        start = offset or 0
+        stop = start + limit if limit is not None else None
+        return states[start:stop]
+
+    def do_count(self, model, *args, where=None, **kwargs):
+        if not kwargs and where is None:
             return len(self.index(model))
-        return len(self.do_query(model, *args, **kwargs))
+        return len(self.filter_states(model, where=where, **kwargs))
+
+    def do_exists(self, model, **kwargs):
+        if not kwargs:
+            return bool(self.index(model))
+
+        # stop at the first attribute index entry matching a value
+        return any(
+            self.attribute_index(model, attribute).get(value)
+            for attribute, values in kwargs.items()
+            for value in model.serialize(listify(values))
+        )
+
+    def do_first(self, model, fields=None, **kwargs):
+        # stop at the first attribute index entry matching a value
+        if kwargs:
+            ids = (
+                id
+                for attribute, values in kwargs.items()
+                for value in model.serialize(listify(values))
+                for id in self.attribute_index(model, attribute).get(value, [])
+            )
+        else:
+            ids = iter(self.index(model))
+
+        id = next(ids, None)
+        if id is None:
+            return None
+
+        return self.build_instances(model, [self.index(model)[id]])[0]
 
     def fuzzy(self, model, query, attributes=None, **kwargs):
         attributes = attributes or model.attributes
@@ -145,22 +301,20 @@ class MemoryBackend(Backend):
             )
         ]
 
-    def get(self, model, identifier=None, /, **kwargs):
+    def do_get(self, model, identifier=None, /, fields=None, **kwargs):
         if identifier:
             return (
-                self.get(model, **{model.identifier_attribute: identifier})
-                or self.get(model, id=identifier)
+                self.do_get(model, **{model.identifier_attribute: identifier})
+                or self.do_get(model, id=identifier)
                 or None
             )
 
-        results = self.query(model, **kwargs)
-        return results[0] if results else None
+        return self.do_first(model, **kwargs)
 
     def do_restore(self, models):
         for model_name, states in models.items():
             model = MODELS[model_name]
-            for state in states:
-                Backend.instance.save(model(**state))
+            Backend.instance.save_many(model(**state) for state in states)
 
     def do_save(self, instance) -> None:
         if not instance.id:
@@ -179,16 +333,31 @@ class MemoryBackend(Backend):
     def do_delete(self, instance) -> None:
         self.index_delete(instance)
 
+    def do_purge_expired(self, model, now, batch_size=100, dry_run=False) -> int:
+        expiry_index = self.expiry_index(model)
+        expired_ids = [
+            id for _, id in expiry_index[: bisect.bisect_left(expiry_index, (now,))]
+        ]
+        if not dry_run:
+            for instance in self.build_instances(
+                model, [self.index(model)[id] for id in expired_ids]
+            ):
+                self.index_delete(instance)
+        return len(expired_ids)
+
     def do_reload(self, instance) -> None:
-        instance._state = Backend.instance.get(
-            instance.__class__, id=instance.id
-        )._state
+        instance._state = self.do_get(instance.__class__, id=instance.id)._state
         instance._cache = {}
 
     def index_save(self, instance) -> None:
         # update the id index
         self.index(instance.__class__)[instance.id] = copy.deepcopy(instance._state)
 
+        # update the expiry index
+        expiry_key = self.expiry_key(instance.__class__, instance._state)
+        if expiry_key:
+            bisect.insort(self.expiry_index(instance.__class__), expiry_key)
+
         # update the index for each attribute
         for attribute in instance.attributes:
             attribute_values = listify(instance._state.get(attribute, []))
@@ -222,6 +391,11 @@ class MemoryBackend(Backend):
 
         old_state = self.index(instance.__class__)[instance.id]
 
+        # update the expiry index
+        expiry_key = self.expiry_key(instance.__class__, old_state)
+        if expiry_key:
+            self.expiry_index(instance.__class__).remove(expiry_key)
+
         # update the index for each attribute
         for attribute in instance.attributes:
             attribute_values = listify(old_state.get(attribute, []))
@@ -6,7 +6,9 @@ from flask import current_app
 from flask_alembic import Alembic
 from sqlalchemy import MetaData
 from sqlalchemy import String
+from sqlalchemy import and_
 from sqlalchemy import create_engine
+from sqlalchemy import delete
 from sqlalchemy import func
 from sqlalchemy import inspect
 from sqlalchemy import or_
@@ -15,6 +17,7 @@ from sqlalchemy import text
 from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
@@ -105,10 +108,15 @@ class SQLBackend(Backend):
                 self.alembic.upgrade()
 
     def teardown(self) -> None:
+        super().teardown()
         if self.db_session:  # pragma: no branch
             self.db_session.rollback()
             self.db_session.expire_all()
 
+    def identity_map(self):
+        # the SQLAlchemy session already plays this role
+        return None
+
     @classmethod
     def check_network_config(cls, config):
         sess = Session(SQLBackend.engine)
@@ -153,26 +161,98 @@ class SQLBackend(Backend):
         ).replace(microsecond=0)
         self.save(user)
 
-    def do_query(self, model, *args, **kwargs):
+    def do_query(
+        self,
+        model,
+        *args,
+        offset=None,
+        limit=None,
+        order_by=None,
+        descending=False,
+        fields=None,
+        where=None,
+        **kwargs,
+    ):
         filter = [
             model.attribute_filter(attribute_name, expected_value)
             for attribute_name, expected_value in kwargs.items()
         ]
-        return (
-            SQLBackend.instance.db_session.execute(select(model).filter(*filter))
-            .scalars()
-            .all()
+        if where is not None:
+            filter.append(model.where_filter(where))
+        statement = (
+            select(model)
+            .filter(*filter)
+            .options(*self.load_only_options(model, fields))
         )
-
-    def do_count(self, model, *args, **kwargs):
+        if order_by or offset or limit is not None:
+            columns = [getattr(model, order_by)] if order_by else []
+            statement = statement.order_by(
+                *(
+                    column.desc() if descending else column.asc()
+                    for column in columns + [model.id]
+                )
+            )
+        if offset:
+            statement = statement.offset(offset)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return SQLBackend.instance.db_session.execute(statement).scalars().all()
+
+    def do_iter_query(self, model, batch_size=100, fields=None, **kwargs):
+        # keyset pagination on the primary key: each batch is an indexed
+        # range scan, and commits between batches do not break the iteration
+        filter = [
+            model.attribute_filter(attribute_name, expected_value)
+            for attribute_name, expected_value in kwargs.items()
+        ]
+        last_id = None
+        while True:
+            statement = (
+                select(model)
+                .filter(*filter)
+                .options(*self.load_only_options(model, fields))
+            )
+            if last_id is not None:
+                statement = statement.filter(model.id > last_id)
+            statement = statement.order_by(model.id.asc()).limit(batch_size)
+            batch = SQLBackend.instance.db_session.execute(statement).scalars().all()
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1].id
+
+    def do_count(self, model, *args, where=None, **kwargs):
         filter = [
             model.attribute_filter(attribute_name, expected_value)
             for attribute_name, expected_value in kwargs.items()
         ]
+        if where is not None:
+            filter.append(model.where_filter(where))
         return SQLBackend.instance.db_session.execute(
             select(func.count()).select_from(model).filter(*filter)
         ).scalar()
 
+    def do_exists(self, model, **kwargs):
+        filter = [
+            model.attribute_filter(attribute_name, expected_value)
+            for attribute_name, expected_value in kwargs.items()
+        ]
+        statement = select(model.id).filter(*filter).limit(1)
+        return SQLBackend.instance.db_session.execute(statement).first() is not None
+
+    def do_first(self, model, fields=None, **kwargs):
+        filter = [
+            model.attribute_filter(attribute_name, expected_value)
+            for attribute_name, expected_value in kwargs.items()
+        ]
+        statement = (
+            select(model)
+            .filter(*filter)
+            .options(*self.load_only_options(model, fields))
+            .limit(1)
+        )
+        return SQLBackend.instance.db_session.execute(statement).scalars().first()
+
     def fuzzy(self, model, query, attributes=None, **kwargs):
         attributes = attributes or model.attributes
 
@@ -210,21 +290,33 @@ class SQLBackend(Backend):
             return history.deleted[0]
         return getattr(instance, attribute)
 
-    def get(self, model, identifier=None, /, **kwargs):
+    def do_get(self, model, identifier=None, /, fields=None, **kwargs):
         if identifier:
             return (
-                self.get(model, **{model.identifier_attribute: identifier})
-                or self.get(model, id=identifier)
+                self.do_get(
+                    model,
+                    fields=fields,
+                    **{model.identifier_attribute: identifier},
+                )
+                or self.do_get(model, fields=fields, id=identifier)
                 or None
             )
 
-        filter = [
-            model.attribute_filter(attribute_name, expected_value)
-            for attribute_name, expected_value in kwargs.items()
-        ]
-        return SQLBackend.instance.db_session.execute(
-            select(model).filter(*filter)
-        ).scalar_one_or_none()
+        return self.do_first(model, fields=fields, **kwargs)
+
+    @staticmethod
+    def load_only_options(model, fields):
+        """Build the loader options restricting the loaded columns to some fields.
+
+        Fields that are not columns, such as relationships, are already
+        lazily loaded.
+        """
+        if not fields:
+            return []
+
+        column_attrs = inspect(model).column_attrs
+        columns = [getattr(model, field) for field in fields if field in column_attrs]
+        return [load_only(*columns or [model.id])]
 
     def do_restore(self, payload):
         # Create models without references to other models
@@ -232,17 +324,19 @@ class SQLBackend(Backend):
         # so it has to be created first, and then must be added to its own audience.
         for model_name, model in MODELS.items():
             states = payload.get(model_name, [])
+            objs = []
             for state in states:
                 sql_state = self.filter_state(
                     model, state, keep_non_model_and_required_attrs=True
                 )
                 sql_state = self.replace_ids_with_instances(model, sql_state)
-                obj = model(**sql_state)
-                Backend.instance.save(obj)
+                objs.append(model(**sql_state))
+            Backend.instance.save_many(objs)
 
         # Insert model references
         for model_name, model in MODELS.items():
             states = payload.get(model_name, [])
+            objs = []
             for state in states:
                 obj_id = state["id"]
                 sql_state = self.filter_state(
@@ -252,7 +346,8 @@ class SQLBackend(Backend):
                 obj = Backend.instance.get(model, obj_id)
                 for attr, value in sql_state.items():
                     setattr(obj, attr, value)
-                Backend.instance.save(obj)
+                objs.append(obj)
+            Backend.instance.save_many(objs)
 
     @classmethod
     def filter_state(cls, model, state, keep_non_model_and_required_attrs):
@@ -288,19 +383,72 @@ class SQLBackend(Backend):
         return state
 
     def do_save(self, instance) -> None:
-        instance.last_modified = datetime.datetime.now(datetime.timezone.utc).replace(
-            microsecond=0
-        )
-        if not instance.created:
-            instance.created = instance.last_modified
+        self.do_save_many([instance])
+
+    def do_save_many(self, instances) -> None:
+        now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        for instance in instances:
+            instance.last_modified = now
+            if not instance.created:
+                instance.created = instance.last_modified
 
-        SQLBackend.instance.db_session.add(instance)
+        # the unit of work batches the inserts with executemany
+        SQLBackend.instance.db_session.add_all(instances)
         SQLBackend.instance.db_session.commit()
 
     def do_delete(self, instance) -> None:
-        SQLBackend.instance.db_session.delete(instance)
+        self.do_delete_many([instance])
+
+    def do_delete_many(self, instances) -> None:
+        for instance in instances:
+            SQLBackend.instance.db_session.delete(instance)
         SQLBackend.instance.db_session.commit()
 
+    def do_purge_expired(self, model, now, batch_size=100, dry_run=False) -> int:
+        session = SQLBackend.instance.db_session
+
+        # Adding seconds to a date is not portable across SQL dialects,
+        # but there are only a handful of distinct lifetimes, so the dates
+        # are compared to one precomputed limit per lifetime instead.
+        lifetimes = session.execute(select(model.lifetime).distinct()).scalars().all()
+        if not lifetimes:
+            return 0
+
+        condition = or_(
+            *(
+                and_(
+                    model.lifetime == lifetime
+                    if lifetime is not None
+                    else model.lifetime.is_(None),
+                    model.issue_date < now - datetime.timedelta(seconds=lifetime or 0),
+                )
+                for lifetime in lifetimes
+            )
+        )
+
+        if dry_run:
+            return session.execute(
+                select(func.count()).select_from(model).where(condition)
+            ).scalar_one()
+
+        # ON DELETE CASCADE is not enforced by SQLite without
+        # PRAGMA foreign_keys, so the dependent rows are removed explicitly.
+        expired_ids = select(model.id).where(condition)
+        for table in Base.metadata.tables.values():
+            for foreign_key in table.foreign_keys:
+                if foreign_key.column.table is model.__table__:
+                    session.execute(
+                        delete(table).where(foreign_key.parent.in_(expired_ids))
+                    )
+
+        result = session.execute(
+            delete(model)
+            .where(condition)
+            .execution_options(synchronize_session="fetch")
+        )
+        session.commit()
+        return result.rowcount
+
     def do_reload(self, instance) -> None:
         SQLBackend.instance.db_session.refresh(instance)
 
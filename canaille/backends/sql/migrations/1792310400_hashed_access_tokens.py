@@ -0,0 +1,66 @@
+"""Hashed access tokens.
+
+Revision ID: 1792310400
+Revises: 1785442300
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+import hashlib
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1792310400"
+down_revision: str | None = "1785442300"
+branch_labels: str | Sequence[str] | None = ()
+depends_on: str | Sequence[str] | None = None
+
+token = sa.table(
+    "token",
+    sa.column("id", sa.String(36)),
+    sa.column("access_token", sa.Text()),
+    sa.column("access_token_digest", sa.String(64)),
+)
+
+
+def upgrade() -> None:
+    """Look the tokens up by a digest of their access token.
+
+    Access tokens are JWTs that can weigh a few kilobytes, so the unique
+    index on the access token is replaced by an index on its SHA-256 digest.
+    """
+    with op.batch_alter_table("token") as batch_op:
+        batch_op.add_column(
+            sa.Column("access_token_digest", sa.String(length=64), nullable=True)
+        )
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(token.c.id, token.c.access_token).where(
+            token.c.access_token.is_not(None)
+        )
+    ).all()
+    for id, access_token in rows:
+        connection.execute(
+            token.update()
+            .where(token.c.id == id)
+            .values(
+                access_token_digest=hashlib.sha256(access_token.encode()).hexdigest()
+            )
+        )
+
+    with op.batch_alter_table("token") as batch_op:
+        batch_op.drop_constraint("uq_token_access_token", type_="unique")
+        batch_op.create_index(
+            "ix_token_access_token_digest", ["access_token_digest"], unique=True
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("token") as batch_op:
+        batch_op.drop_index("ix_token_access_token_digest")
+        batch_op.create_unique_constraint("uq_token_access_token", ["access_token"])
+        batch_op.drop_column("access_token_digest")
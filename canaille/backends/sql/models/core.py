@@ -8,6 +8,10 @@ from sqlalchemy import Integer
 from sqlalchemy import LargeBinary
 from sqlalchemy import String
 from sqlalchemy import Text
+from sqlalchemy import and_
+from sqlalchemy import false
+from sqlalchemy import func
+from sqlalchemy import not_
 from sqlalchemy import or_
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import Mapped
@@ -20,6 +24,10 @@ from sqlalchemy_utils import force_auto_coercion
 
 import canaille.core.models
 from canaille.backends import Backend
+from canaille.backends.filters import And
+from canaille.backends.filters import Comparison
+from canaille.backends.filters import Not
+from canaille.backends.filters import Or
 from canaille.backends.models import BackendModel
 
 from ..backend import Base
@@ -67,6 +75,64 @@ class SqlAlchemyModel(BackendModel):
 
         return getattr(cls, name) == value
 
+    @classmethod
+    def where_filter(cls, where):
+        """Translate a :mod:`~canaille.backends.filters` tree into a SQL expression.
+
+        Multi-valued attributes are stored as JSON arrays, so their substring
+        comparisons match on the serialized array.
+        """
+        if isinstance(where, And):
+            return and_(*(cls.where_filter(operand) for operand in where.operands))
+
+        if isinstance(where, Or):
+            return or_(*(cls.where_filter(operand) for operand in where.operands))
+
+        if isinstance(where, Not):
+            # NULL comparisons are unknown, and would not match their negation
+            return not_(func.coalesce(cls.where_filter(where.operand), false()))
+
+        name, operator, value = where.attribute, where.operator, where.value
+        if operator == "eq":
+            return cls.attribute_filter(name, value)
+
+        if operator == "ne":
+            return cls.where_filter(Not(Comparison(name, "eq", value)))
+
+        column = getattr(cls, name)
+        multiple = typing.get_origin(cls.attributes[name]) is list
+        if operator == "pr":
+            if multiple:
+                return and_(
+                    column.isnot(None), column.cast(String).notin_(["[]", "null"])
+                )
+            return column.isnot(None)
+
+        if operator in ("co", "sw", "ew"):
+            escaped = (
+                str(value).replace("/", "//").replace("%", "/%").replace("_", "/_")
+            )
+            if multiple:
+                column = column.cast(String)
+                escaped = json.dumps(escaped)[1:-1]
+                start, end = '%"', '"%'
+            else:
+                start, end = "", ""
+
+            pattern = {
+                "co": f"%{escaped}%",
+                "sw": f"{start}{escaped}%",
+                "ew": f"%{escaped}{end}",
+            }[operator]
+            return column.ilike(pattern, escape="/")
+
+        return {
+            "gt": column > value,
+            "ge": column >= value,
+            "lt": column < value,
+            "le": column <= value,
+        }[operator]
+
     @classmethod
     def is_attr_required(cls, attr_name: str) -> bool:
         if attr_name in class_mapper(cls).relationships and hasattr(
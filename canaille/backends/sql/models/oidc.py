@@ -204,7 +204,10 @@ class Token(canaille.oidc.models.Token, Base, SqlAlchemyModel):
     )
 
     token_id: Mapped[str] = mapped_column(String(255), nullable=True)
-    access_token: Mapped[str] = mapped_column(Text, nullable=True, unique=True)
+    access_token: Mapped[str] = mapped_column(Text, nullable=True)
+    access_token_digest: Mapped[str] = mapped_column(
+        String(64), nullable=True, unique=True, index=True
+    )
     client_id: Mapped[str] = mapped_column(ForeignKey("client.id", ondelete="CASCADE"))
     client: Mapped["Client"] = relationship()
     subject_id: Mapped[str] = mapped_column(
@@ -359,7 +359,7 @@ def build_profile_form(write_field_names, readonly_field_names, user=None):
         if PROFILE_FORM_FIELDS.get(name)
     }
 
-    if "groups" in fields and not Backend.instance.query(models.Group):
+    if "groups" in fields and not Backend.instance.exists(models.Group):
         del fields["groups"]
 
     if current_app.features.has_account_lockability:  # pragma: no branch
@@ -258,7 +258,7 @@ def invite_to_group(user, group):
 
     if request.form and form.validate():
         form_validated = True
-        invited_user = Backend.instance.query(models.User, emails=form.email.data)[0]
+        invited_user = Backend.instance.first(models.User, emails=form.email.data)
 
         expiration_date = datetime.datetime.now(
             datetime.timezone.utc
@@ -61,16 +61,16 @@ def fake_users(nb=1):
                 preferred_language=locale,
                 photo=generate_avatar(),
             )
-            Backend.instance.save(user)
             users.append(user)
         except Exception:  # pragma: no cover
             current_app.logger.debug("Failed to create fake user", exc_info=True)
             pass
+    Backend.instance.save_many(users)
     return users
 
 
 def fake_groups(nb=1, nb_users_max=1):
-    users = Backend.instance.query(models.User)
+    nb_users_total = Backend.instance.count(models.User)
     groups = list()
     fake = faker.Faker(["en_US"])
     for _ in range(nb):
@@ -81,10 +81,19 @@ def fake_groups(nb=1, nb_users_max=1):
             )
             if nb_users_max:
                 nb_users = random.randrange(1, nb_users_max + 1)
-                group.members = list({random.choice(users) for _ in range(nb_users)})
-            Backend.instance.save(group)
+                group.members = list(
+                    {
+                        Backend.instance.query(
+                            models.User,
+                            offset=random.randrange(nb_users_total),
+                            limit=1,
+                        )[0]
+                        for _ in range(nb_users)
+                    }
+                )
             groups.append(group)
         except Exception:  # pragma: no cover
             current_app.logger.debug("Failed to create fake groups", exc_info=True)
             pass
+    Backend.instance.save_many(groups)
     return groups
@@ -13,7 +13,7 @@ from canaille.core.photo import check_photo
 
 
 def unique_user_name(form, field):
-    if Backend.instance.get(models.User, user_name=field.data) and (
+    if Backend.instance.exists(models.User, user_name=field.data) and (
         not getattr(form, "user", None) or form.user.user_name != field.data
     ):
         raise wtforms.ValidationError(
@@ -22,7 +22,7 @@ def unique_user_name(form, field):
 
 
 def unique_email(form, field):
-    if Backend.instance.get(models.User, emails=field.data) and (
+    if Backend.instance.exists(models.User, emails=field.data) and (
         not getattr(form, "user", None) or field.data not in (form.user.emails or [])
     ):
         raise wtforms.ValidationError(
@@ -31,7 +31,7 @@ def unique_email(form, field):
 
 
 def unique_group(form, field):
-    if Backend.instance.get(models.Group, display_name=field.data):
+    if Backend.instance.exists(models.Group, display_name=field.data):
         raise wtforms.ValidationError(
             _("The group '{group}' already exists").format(group=field.data)
         )
@@ -79,19 +79,14 @@ def non_empty_groups(form, field):
 
 def email_has_user(form, field):
     """Validate that the email address corresponds to an existing user."""
-    existing_users = Backend.instance.query(models.User, emails=field.data)
-    if not existing_users:
+    if not Backend.instance.exists(models.User, emails=field.data):
         raise wtforms.ValidationError(_("No user found with this email address."))
 
 
 def user_not_in_group(form, field):
     """Validate that the user with this email is not already a group member."""
-    existing_users = Backend.instance.query(models.User, emails=field.data)
-    if not existing_users:
-        return
-
-    invited_user = existing_users[0]
-    if invited_user in form.group.members:
+    invited_user = Backend.instance.first(models.User, emails=field.data)
+    if invited_user and invited_user in form.group.members:
         raise wtforms.ValidationError(
             _("A user with this email address is already a member of this group.")
         )
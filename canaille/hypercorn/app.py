@@ -4,6 +4,7 @@ from asgiref.wsgi import WsgiToAsgi
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 import canaille
+from canaille.hypercorn.asgi import ASGIApplication
 
 
 def create_app(
@@ -12,13 +13,15 @@ def create_app(
     """Create a Hypercorn-ready ASGI application with proxy support.
 
     This function creates a Flask application and applies the ProxyFix middleware
-    if PROXY_MODE is configured, then wraps it with WsgiToAsgi for ASGI compatibility.
+    if PROXY_MODE is configured, then wraps it for ASGI compatibility. If
+    NATIVE_ASGI is enabled, the protocol endpoints are served without the
+    WsgiToAsgi bridge.
 
     :param config: Optional configuration dict to pass to create_app
     :param backend: Optional backend to pass to create_app
     :param env_file: Environment file to load
-    :param wrap_asgi: If True, wrap the Flask app with WsgiToAsgi
-    :return: ASGI application (WsgiToAsgi wrapped Flask app) or Flask app if wrap_asgi=False
+    :param wrap_asgi: If True, wrap the Flask app in an ASGI application
+    :return: ASGI application or Flask app if wrap_asgi=False
     """
     app = canaille.create_app(config=config, backend=backend, env_file=env_file)
 
@@ -44,6 +47,9 @@ def create_app(
             x_prefix=trusted_hops,
         )
 
+    if wrap_asgi and app.config["CANAILLE_HYPERCORN"]["NATIVE_ASGI"]:
+        return ASGIApplication(app)
+
     if wrap_asgi:
         return WsgiToAsgi(app)
 
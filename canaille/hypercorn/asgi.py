@@ -0,0 +1,121 @@
+import io
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+
+NATIVE_PATHS = (
+    "/oauth/token",
+    "/oauth/userinfo",
+    "/oauth/introspect",
+    "/oauth/jwks.json",
+    "/.well-known/",
+    "/scim/v2/",
+)
+"""The path prefixes of the protocol endpoints served without the WSGI bridge."""
+
+
+def build_environ(scope, body):
+    """Build a :pep:`3333` WSGI environment from an ASGI HTTP scope."""
+    script_name = scope.get("root_path", "").encode().decode("latin1")
+    path_info = scope["path"].encode().decode("latin1")
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name) :]
+
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port or 0),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if client := scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = client[0], str(client[1])
+
+    for raw_name, raw_value in scope["headers"]:
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_LENGTH", "CONTENT_TYPE"):
+            name = f"HTTP_{name}"
+        value = raw_value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+
+    return environ
+
+
+class ASGIApplication:
+    """Serve the protocol endpoints natively, and the other ones through a bridge.
+
+    The requests on :data:`NATIVE_PATHS` are dispatched to the Flask
+    application directly in the event loop: the body is read once from the
+    ASGI channel, and the response is sent in a single message. Those
+    endpoints are short, and this avoids the thread hop and the body copies
+    of :class:`~asgiref.wsgi.WsgiToAsgi`, which still serves the HTML
+    interface and its streamed responses.
+    """
+
+    def __init__(self, app, native_paths=NATIVE_PATHS):
+        self.app = app
+        self.native_paths = tuple(native_paths)
+        self.bridge = WsgiToAsgi(app)
+
+    def is_native(self, scope):
+        if scope["type"] != "http":
+            return False
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+        return path.startswith(self.native_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not self.is_native(scope):
+            return await self.bridge(scope, receive, send)
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        status, headers, body = self.dispatch(build_environ(scope, b"".join(chunks)))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.lower().encode("latin1"), value.encode("latin1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def dispatch(self, environ):
+        """Run the WSGI application and collect its response."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+
+        iterable = self.app(environ, start_response)
+        try:
+            body = b"".join(iterable)
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+        return response["status"], response["headers"], body
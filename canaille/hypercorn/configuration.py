@@ -99,6 +99,10 @@ class HypercornSettings(BaseModel):
     MAX_REQUESTS_JITTER: int | None = None
     """The maximum jitter to add to the max_requests setting."""
 
+    NATIVE_ASGI: bool = True
+    """Serve the OAuth, OpenID Connect and SCIM protocol endpoints without the
+    WSGI to ASGI bridge. The HTML interface is always served through the bridge."""
+
     PID_PATH: str | None = None
     """Path to write the process id."""
 
@@ -496,6 +496,12 @@ class Token(Model):
 
     token_id: str
     access_token: str
+    access_token_digest: str
+    """The SHA-256 hex digest of the access token.
+
+    This is computed when the token is saved, and tokens are looked up by
+    this digest rather than by their access token, which can be long."""
+
     client: "Client"
     subject: User | None
     type: str
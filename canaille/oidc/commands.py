@@ -24,17 +24,31 @@ from .jose import server_jwks
 
 
 @click.command()
+@click.option(
+    "--batch-size",
+    default=500,
+    type=click.IntRange(min=1),
+    help="Number of objects removed at once",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Only count the expired objects without removing them",
+)
 @with_appcontext
 @with_backendcontext
-def clean():
+def clean(batch_size: int, dry_run: bool):
     """Remove expired tokens and authorization codes."""
-    for t in Backend.instance.query(models.Token):
-        if t.is_expired():
-            Backend.instance.delete(t)
-
-    for a in Backend.instance.query(models.AuthorizationCode):
-        if a.is_expired():
-            Backend.instance.delete(a)
+    for model, label in (
+        (models.Token, "tokens"),
+        (models.AuthorizationCode, "authorization codes"),
+    ):
+        count = Backend.instance.purge_expired(
+            model, batch_size=batch_size, dry_run=dry_run
+        )
+        verb = "Would remove" if dry_run else "Removed"
+        click.echo(f"{verb} {count} expired {label}")
 
 
 @click.group()
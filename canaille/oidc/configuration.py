@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import model_validator
 
 from canaille.app.configuration import BaseModel
@@ -82,6 +84,41 @@ class OIDCSettings(BaseModel):
     Those keys are only used to verify JWTs.
     The keys can be in the form of JWK dict or raw keys."""
 
+    ACCESS_TOKEN_SIGNING_ALGORITHMS: list[str] = []
+    """The algorithms to sign the access tokens with, by order of preference.
+
+    For instance ``["EdDSA", "ES256"]``. EdDSA and ECDSA signatures are much faster
+    to compute than RSA ones. The first algorithm supported by one of the
+    :attr:`ACTIVE_JWKS` is used, and the RSA keys are used if none is supported.
+    This is ignored for the clients that set their
+    :attr:`~canaille.oidc.basemodels.Client.id_token_signed_response_alg`.
+    """
+
+    ACCESS_TOKEN_FORMAT: Literal["jwt", "reference"] = "jwt"
+    """The format of the access tokens.
+
+    - ``jwt``: Access tokens are self-contained JWTs signed by the server,
+      as defined in RFC9068.
+    - ``reference``: Access tokens are short random strings, that are only
+      meaningful to Canaille. They are smaller, but they can only be
+      validated by the introspection endpoint.
+
+    In both cases, the tokens are stored in the database.
+    Tokens from the ``client_credentials`` grant are always references."""
+
+    STATELESS_TOKEN_VALIDATION: bool = False
+    """Whether the JWT access tokens are validated without reading the database.
+
+    When enabled, the userinfo and SCIM endpoints check the signature, the
+    issuer and the expiration of the JWT access tokens, and the list of
+    revoked tokens. This list is shared through the cache, and rebuilt from
+    the database every few minutes. The introspection and revocation
+    endpoints still read the tokens in the database.
+
+    Tokens deleted from the database without being revoked first stay valid
+    until they expire. This has no effect on ``reference`` tokens.
+    """
+
     TRUSTED_DOMAINS: CommaSeparatedList = [".localhost", "127.0.0.1"]
     """Trusted domains for automatic client trust.
 
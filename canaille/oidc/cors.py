@@ -4,14 +4,21 @@ Should be removed in favor of flask-cors when this PR is merged:
 https://github.com/corydolphin/flask-cors/pull/401
 """
 
+import time
 from urllib.parse import urlparse
 
+from blinker import signal
 from flask import Flask
+from flask import current_app
 from flask import request
 
 from canaille.app import models
+from canaille.app.flask import cache
 from canaille.backends import Backend
 
+ORIGINS_CACHE_LIFETIME = 300
+ORIGINS_GENERATION_KEY = "cors:generation"
+
 
 def get_client_origin(client) -> str | None:
     """Extract the origin from a client's client_uri."""
@@ -25,16 +32,49 @@ def get_client_origin(client) -> str | None:
     return None
 
 
-def get_allowed_origins() -> set[str]:
-    """Get all allowed CORS origins from registered clients."""
-    origins = set()
-    clients = Backend.instance.query(models.Client)
-    for client in clients:
-        if origin := get_client_origin(client):
-            origins.add(origin)
+def build_allowed_origins() -> frozenset[str]:
+    """Build the allowed CORS origins from the registered clients."""
+    clients = Backend.instance.query(models.Client, fields=["client_uri"])
+    return frozenset(
+        origin for client in clients if (origin := get_client_origin(client))
+    )
+
+
+def get_allowed_origins() -> frozenset[str]:
+    """Get all allowed CORS origins from registered clients.
+
+    The origins are kept in the application for at most
+    :data:`ORIGINS_CACHE_LIFETIME` seconds, and shared through the
+    application cache. Saving or deleting a client increments a generation
+    counter in the cache, so the workers sharing the cache notice the change
+    and rebuild the origins.
+    """
+    generation = cache.get(ORIGINS_GENERATION_KEY) or 0
+    now = time.monotonic()
+    registry = current_app.extensions.get("canaille_cors_origins")
+    if (
+        registry
+        and registry[0] == generation
+        and now - registry[1] < ORIGINS_CACHE_LIFETIME
+    ):
+        return registry[2]
+
+    key = f"cors:origins:{generation}"
+    origins = cache.get(key)
+    if origins is None:
+        origins = build_allowed_origins()
+        cache.set(key, origins, timeout=ORIGINS_CACHE_LIFETIME)
+
+    current_app.extensions["canaille_cors_origins"] = (generation, now, origins)
     return origins
 
 
+def invalidate_allowed_origins(client, data):
+    current_app.extensions.pop("canaille_cors_origins", None)
+    generation = cache.get(ORIGINS_GENERATION_KEY) or 0
+    cache.set(ORIGINS_GENERATION_KEY, generation + 1, timeout=0)
+
+
 CORS_ENABLED_PATHS = (
     "/.well-known/",
     "/oauth/token",
@@ -54,6 +94,10 @@ def is_cors_enabled_path(path: str) -> bool:
 
 def setup_cors(app: Flask) -> None:
     """Configure CORS for OIDC and SCIM endpoints."""
+    signal("after_client_save").disconnect(invalidate_allowed_origins)
+    signal("after_client_delete").disconnect(invalidate_allowed_origins)
+    signal("after_client_save").connect(invalidate_allowed_origins)
+    signal("after_client_delete").connect(invalidate_allowed_origins)
 
     @app.after_request
     def add_cors_headers(response):
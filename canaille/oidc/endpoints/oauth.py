@@ -10,7 +10,6 @@ from flask import abort
 from flask import current_app
 from flask import flash
 from flask import g
-from flask import jsonify
 from flask import redirect
 from flask import request
 from flask import session
@@ -28,6 +27,8 @@ from canaille.core.auth import redirect_to_next_auth_step
 from canaille.oidc.endpoints.forms import LogoutForm
 
 from ..jose import server_jwks
+from ..metadata import cached_document
+from ..metadata import document_response
 from ..provider import ClientConfigurationEndpoint
 from ..provider import ClientRegistrationEndpoint
 from ..provider import EndSessionEndpoint
@@ -35,6 +36,7 @@ from ..provider import IntrospectionEndpoint
 from ..provider import RevocationEndpoint
 from ..provider import UserInfoEndpoint
 from ..provider import authorization
+from ..tokens import get_stored_token
 from ..utils import SCOPE_DETAILS
 from ..utils import unique_scopes
 from .forms import AuthorizeForm
@@ -365,7 +367,7 @@ def issue_token():
 
     if response.json.get("access_token"):
         access_token = response.json["access_token"]
-        token = Backend.instance.get(models.Token, access_token=access_token)
+        token = get_stored_token(access_token)
         if token.subject:
             current_app.logger.security(
                 f"Issued {grant_type} token for {token.subject.user_name} in client {token.client.client_name}"
@@ -436,8 +438,9 @@ def client_registration_management(client_id):
 
 @bp.route("/jwks.json")
 def jwks():
-    jwks = server_jwks()
-    return jsonify(jwks.as_dict(private=False))
+    return document_response(
+        cached_document("jwks", lambda: server_jwks().as_dict(private=False))
+    )
 
 
 @bp.route("/userinfo", methods=["GET", "POST"])
@@ -2,27 +2,26 @@ from flask import Blueprint
 from flask import jsonify
 from flask import request
 
+from ..metadata import cached_document
+from ..metadata import document_response
 from ..metadata import oauth_authorization_server
 from ..metadata import openid_configuration
+from ..provider import get_issuer
 
 bp = Blueprint("home", __name__, url_prefix="/.well-known")
 
 
 @bp.route("/oauth-authorization-server")
 def oauth_authorization_server_endpoint():
-    return jsonify(
-        {
-            key: val
-            for key, val in oauth_authorization_server().items()
-            if val is not None
-        }
+    return document_response(
+        cached_document("oauth-authorization-server", oauth_authorization_server)
     )
 
 
 @bp.route("/openid-configuration")
 def openid_configuration_endpoint():
-    return jsonify(
-        {key: val for key, val in openid_configuration().items() if val is not None}
+    return document_response(
+        cached_document("openid-configuration", openid_configuration)
     )
 
 
@@ -32,7 +31,7 @@ def webfinger():
         {
             "links": [
                 {
-                    "href": openid_configuration()["issuer"],
+                    "href": get_issuer(),
                     "rel": "http://openid.net/specs/connect/1.0/issuer",
                 }
             ],
@@ -1,4 +1,5 @@
 import json
+import random
 import uuid
 from datetime import datetime
 from datetime import timedelta
@@ -11,9 +12,19 @@ from joserfc import jwt
 from joserfc.errors import JoseError
 from joserfc.jwk import OKPKey
 from joserfc.jwk import RSAKey
+from joserfc.util import json_b64encode
+from joserfc.util import urlsafe_b64encode
+from werkzeug.datastructures import ResponseCacheControl
+from werkzeug.http import parse_cache_control_header
 
-from canaille.app.flask import cache
-from canaille.oidc.utils import fetch_document
+from canaille.app.cache import get_or_build
+from canaille.oidc.utils import fetch_response
+
+CLIENT_JWKS_DEFAULT_LIFETIME = 60
+"""Lifetime in seconds of the cached client JWKS, when their response has no ``max-age``."""
+
+CLIENT_JWKS_MAX_LIFETIME = 3600
+"""Maximum lifetime in seconds of the cached client JWKS."""
 
 registry = jws.JWSRegistry(algorithms=list(jws.JWSRegistry.algorithms.keys()))
 
@@ -79,6 +90,68 @@ def server_jwks(include_inactive=True):
     return jwk.KeySet([import_server_key(key) for key in keys])
 
 
+class Signer:
+    """A server key prepared to sign JWT access tokens with an algorithm.
+
+    The algorithm lookup and the encoding of the protected header are done
+    once, so signing a token only serializes and signs its payload. The
+    header has the ``at+jwt`` type of :rfc:`9068`.
+    """
+
+    def __init__(self, key, alg):
+        self.key = key
+        self.alg = alg
+        self.kid = key.kid
+        self.algorithm = registry.get_alg(alg)
+        self.encoded_header = json_b64encode(
+            {"typ": "at+jwt", "alg": alg, "kid": key.kid}
+        )
+
+    def sign(self, payload):
+        signing_input = self.encoded_header + b"." + json_b64encode(payload)
+        signature = urlsafe_b64encode(self.algorithm.sign(signing_input, self.key))
+        return (signing_input + b"." + signature).decode()
+
+
+def server_signers():
+    """Return the signers of the active keys, indexed by algorithm.
+
+    The signers are prepared once per :attr:`ACTIVE_JWKS` configuration.
+    The :py:data:`None` index holds the default signers, with the algorithm
+    guessed from the key: the RSA keys, or else the first key.
+    """
+    keys = current_app.config["CANAILLE_OIDC"]["ACTIVE_JWKS"]
+    generation = hash(repr(keys))
+    cached = current_app.extensions.get("canaille_oidc_signers")
+    if cached and cached[0] == generation:
+        return cached[1]
+
+    signers = {}
+    key_set = server_jwks(include_inactive=False)
+    for key in key_set.keys:
+        for alg in registry.filter_algorithms(jwk.KeySet([key])):
+            signers.setdefault(alg.name, []).append(Signer(key, alg.name))
+    default_keys = [signer.key for signer in signers.get("RS256", [])] or [
+        key_set.keys[0]
+    ]
+    signers[None] = [Signer(key, get_alg_for_key(key)) for key in default_keys]
+
+    current_app.extensions["canaille_oidc_signers"] = (generation, signers)
+    return signers
+
+
+def get_signer(algorithms=()):
+    """Return a signer for the first algorithm an active key supports.
+
+    When several keys support the algorithm, one is picked randomly.
+    Fallbacks on the default signers.
+    """
+    signers = server_signers()
+    for alg in [*algorithms, None]:
+        if candidates := signers.get(alg):
+            return random.choice(candidates)
+
+
 def server_signing_key():
     """Return the key the server signs its own tokens with."""
     return server_jwks(include_inactive=False).keys[0]
@@ -95,15 +168,43 @@ def supported_signing_algorithms():
     return algorithms
 
 
+def client_jwks_lifetime(headers) -> int | None:
+    """Compute how long a client JWKS can be cached from its response headers.
+
+    ``None`` means the JWKS must not be cached.
+    """
+    cache_control = parse_cache_control_header(
+        headers.get("cache-control"), cls=ResponseCacheControl
+    )
+    if cache_control.no_store or cache_control.no_cache:
+        return None
+
+    if cache_control.max_age is None:
+        return CLIENT_JWKS_DEFAULT_LIFETIME
+
+    if cache_control.max_age <= 0:
+        return None
+
+    return min(cache_control.max_age, CLIENT_JWKS_MAX_LIFETIME)
+
+
 def get_client_jwks(client, kid=None):
-    """Get the client JWK set, either stored locally or by downloading them from the URI the client indicated."""
+    """Get the client JWK set, either stored locally or by downloading them from the URI the client indicated.
+
+    Downloaded JWKS are cached as long as the ``Cache-Control`` response header
+    allows it, and only one worker downloads them at a time.
+    """
 
-    @cache.cached(timeout=50, key_prefix=f"jwks_{client.client_id}")
     def get_public_jwks():
-        return json.loads(fetch_document(client.jwks_uri))
+        content, headers = fetch_response(client.jwks_uri)
+        return json.loads(content), client_jwks_lifetime(headers)
 
     if client.jwks_uri:
-        raw_jwks = get_public_jwks()
+        raw_jwks = get_or_build(
+            f"jwks:{client.client_id}:{client.jwks_uri}",
+            get_public_jwks,
+            namespace="client_jwks",
+        )
         key_set = jwk.KeySet.import_key_set(raw_jwks)
         key = key_set.get_by_kid(kid)
         return key
@@ -1,8 +1,12 @@
+import hashlib
+from typing import NamedTuple
+
 from authlib.oauth2 import rfc8414
 from authlib.oauth2 import rfc9101
 from authlib.oidc import discovery as oidc_discovery
 from flask import current_app
 from flask import g
+from flask import request
 from flask import url_for
 
 from canaille.app import DOCUMENTATION_URL
@@ -134,3 +138,60 @@ def openid_configuration():
     obj = oidc_discovery.OpenIDProviderMetadata(payload)
     obj.validate()
     return obj
+
+
+DOCUMENT_MAX_AGE = 300
+"""How long clients may use a discovery document or the JWKS without revalidating it."""
+
+
+class Document(NamedTuple):
+    """A JSON document serialized once and ready to be sent."""
+
+    payload: dict
+    body: bytes
+    etag: str
+
+
+def documents_generation():
+    """Identify the configuration the documents are built from.
+
+    The documents are rebuilt when the keys or the registration
+    setting change.
+    """
+    oidc_config = current_app.config["CANAILLE_OIDC"]
+    return hash(
+        repr(
+            (
+                oidc_config["ACTIVE_JWKS"],
+                oidc_config["INACTIVE_JWKS"],
+                current_app.config["CANAILLE"]["ENABLE_REGISTRATION"],
+            )
+        )
+    )
+
+
+def cached_document(name, build):
+    """Return a document, built and serialized once per host and configuration.
+
+    :param name: The name of the document.
+    :param build: A function returning the payload of the document.
+    """
+    generation = documents_generation()
+    key = (name, request.host_url)
+    documents = current_app.extensions.setdefault("canaille_oidc_documents", {})
+    document_generation, document = documents.get(key, (None, None))
+    if document is None or document_generation != generation:
+        payload = {key: val for key, val in build().items() if val is not None}
+        body = current_app.json.response(payload).get_data()
+        document = Document(payload, body, hashlib.sha256(body).hexdigest())
+        documents[key] = (generation, document)
+    return document
+
+
+def document_response(document):
+    """Serve a document with a strong ETag, and handle conditional requests."""
+    response = current_app.response_class(document.body, mimetype="application/json")
+    response.set_etag(document.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = DOCUMENT_MAX_AGE
+    return response.make_conditional(request)
@@ -0,0 +1,29 @@
+"""Store of the nonces used in the authorization requests, to detect replays.
+
+The nonces are kept in the cache with their own lifetime, so checking whether
+a nonce was used does not read the backend. They are only shared between the
+server workers if the cache is, see
+:attr:`~canaille.app.configuration.RootSettings.CACHE_TYPE`.
+"""
+
+import hashlib
+
+from canaille.app.flask import cache
+
+NONCE_LIFETIME = 24 * 3600
+
+
+def nonce_key(client_id, nonce):
+    # nonces are chosen by the clients, so their length is not bounded
+    digest = hashlib.sha256(nonce.encode()).hexdigest()
+    return f"nonce:{client_id}:{digest}"
+
+
+def remember_nonce(client_id, nonce):
+    """Record that a client used a nonce."""
+    cache.set(nonce_key(client_id, nonce), 1, timeout=NONCE_LIFETIME)
+
+
+def is_nonce_used(client_id, nonce):
+    """Indicate whether a client already used a nonce."""
+    return cache.get(nonce_key(client_id, nonce)) is not None
@@ -1,5 +1,6 @@
 import datetime
 import json
+import time
 import uuid
 
 from authlib.integrations.flask_oauth2 import AuthorizationServer
@@ -19,7 +20,6 @@ from authlib.oauth2.rfc6749 import InvalidScopeError
 from authlib.oidc import core as oidc_core
 from authlib.oidc import registration as oidc_registration
 from authlib.oidc import rpinitiated
-from authlib.oidc.core.grants.util import generate_id_token
 from flask import current_app
 from flask import g
 from flask import request
@@ -36,11 +36,16 @@ from canaille.oidc.utils import is_trusted_domain
 
 from .jose import build_client_management_token
 from .jose import decode_server_token
-from .jose import get_alg_for_key
 from .jose import get_client_jwks
+from .jose import get_signer
 from .jose import make_default_okp_jwk
 from .jose import make_default_rsa_jwk
 from .jose import server_jwks
+from .nonces import is_nonce_used
+from .nonces import remember_nonce
+from .tokens import authenticate_access_token
+from .tokens import get_token_by_access_token
+from .tokens import setup_token_cache
 from .userinfo import UserInfo
 from .userinfo import generate_user_claims
 from .utils import unique_scopes
@@ -89,11 +94,7 @@ def get_bearer_token(request):
 
 
 def exists_nonce(nonce, request):
-    client = Backend.instance.get(models.Client, id=request.payload.client_id)
-    exists = Backend.instance.query(
-        models.AuthorizationCode, client=client, nonce=nonce
-    )
-    return bool(exists)
+    return is_nonce_used(request.payload.client_id, nonce)
 
 
 def get_issuer():
@@ -104,22 +105,22 @@ def get_issuer():
     return request.url_root
 
 
-def _get_signing_key(client):
-    """Select the signing key and algorithm for the given client."""
-    jwks = server_jwks(include_inactive=False)
-    jwk = None
-    alg = None
-    if client and (alg := client.id_token_signed_response_alg):
-        jwk = jwks.pick_random_key(alg)
+def _get_signer(client, preferred_algorithms=()):
+    """Select the signer for the given client.
 
-    if jwk is None:
-        alg = None
-        jwk = jwks.pick_random_key("RS256")
+    The client ``id_token_signed_response_alg`` takes precedence over the
+    preferred algorithms.
+    """
+    if client and client.id_token_signed_response_alg:
+        return get_signer([client.id_token_signed_response_alg])
+
+    return get_signer(preferred_algorithms)
 
-    if jwk is None:
-        jwk = jwks.keys[0]
 
-    return jwk, alg or get_alg_for_key(jwk)
+def _get_signing_key(client):
+    """Select the signing key and algorithm for the given client."""
+    signer = _get_signer(client)
+    return signer.key, signer.alg
 
 
 def get_jwt_config(client):
@@ -154,6 +155,8 @@ def save_authorization_code(code, request):
         amr=amr,
     )
     Backend.instance.save(code)
+    if nonce:
+        remember_nonce(request.client.client_id, nonce)
     return code.code
 
 
@@ -164,10 +167,7 @@ class JWTClientAuth(rfc7523.JWTBearerClientAssertion):
     def validate_jti(self, claims, jti):
         """Indicate whether the jti was used before."""
         key = "jti:{}-{}".format(claims["sub"], jti)
-        if cache.get(key):
-            return False
-        cache.set(key, 1, timeout=JWT_JTI_CACHE_LIFETIME)
-        return True
+        return cache.add(key, 1, timeout=JWT_JTI_CACHE_LIFETIME)
 
     def resolve_client_public_key(self, client):
         jwk = get_client_jwks(client)
@@ -189,11 +189,11 @@ class AuthorizationCodeGrant(rfc6749.AuthorizationCodeGrant):
         return save_authorization_code(code, request)
 
     def query_authorization_code(self, code, client):
-        item = Backend.instance.query(
+        item = Backend.instance.first(
             models.AuthorizationCode, code=code, client=client
         )
-        if item and not item[0].is_expired():
-            return item[0]
+        if item and not item.is_expired():
+            return item
 
     def delete_authorization_code(self, authorization_code):
         Backend.instance.delete(authorization_code)
@@ -230,7 +230,7 @@ class OpenIDCode(OIDCGrantMixin, oidc_core.OpenIDCode):
         return exists_nonce(nonce, request)
 
     def generate_user_info(self, user, scope):
-        return UserInfo(generate_user_claims(user)).filter(scope)
+        return UserInfo(generate_user_claims(user, scope=scope))
 
 
 class PasswordGrant(rfc6749.ResourceOwnerPasswordCredentialsGrant):
@@ -263,9 +263,9 @@ class RefreshTokenGrant(rfc6749.RefreshTokenGrant):
     INCLUDE_NEW_REFRESH_TOKEN = True
 
     def authenticate_refresh_token(self, refresh_token):
-        token = Backend.instance.query(models.Token, refresh_token=refresh_token)
-        if token and token[0].is_refresh_token_active():
-            return token[0]
+        token = Backend.instance.first(models.Token, refresh_token=refresh_token)
+        if token and token.is_refresh_token_active():
+            return token
 
     def authenticate_user(self, credential):
         if credential.subject and not credential.subject.locked:
@@ -300,7 +300,7 @@ class OpenIDImplicitGrant(OIDCGrantMixin, oidc_core.OpenIDImplicitGrant):
         return exists_nonce(nonce, request)
 
     def generate_user_info(self, user, scope):
-        return UserInfo(generate_user_claims(user)).filter(scope)
+        return UserInfo(generate_user_claims(user, scope=scope))
 
 
 class OpenIDHybridGrant(OIDCGrantMixin, oidc_core.OpenIDHybridGrant):
@@ -311,7 +311,7 @@ class OpenIDHybridGrant(OIDCGrantMixin, oidc_core.OpenIDHybridGrant):
         return exists_nonce(nonce, request)
 
     def generate_user_info(self, user, scope):
-        return UserInfo(generate_user_claims(user)).filter(scope)
+        return UserInfo(generate_user_claims(user, scope=scope))
 
 
 def query_client(client_id):
@@ -366,16 +366,16 @@ class CanailleAuthorizationServer(AuthorizationServer):
 
 class BearerTokenValidator(rfc6750.BearerTokenValidator):
     def authenticate_token(self, token_string):
-        return Backend.instance.get(models.Token, access_token=token_string)
+        return authenticate_access_token(token_string)
 
 
 def query_token(token, token_type_hint):
     if token_type_hint == "access_token":
-        return Backend.instance.get(models.Token, access_token=token)
+        return get_token_by_access_token(token)
     elif token_type_hint == "refresh_token":
         return Backend.instance.get(models.Token, refresh_token=token)
 
-    item = Backend.instance.get(models.Token, access_token=token)
+    item = get_token_by_access_token(token)
     if item:
         return item
 
@@ -651,7 +651,7 @@ class UserInfoEndpoint(oidc_core.UserInfoEndpoint):
         return get_issuer()
 
     def generate_user_info(self, user, scope):
-        return UserInfo(generate_user_claims(user)).filter(scope)
+        return UserInfo(generate_user_claims(user, scope=scope))
 
     def resolve_private_key(self):
         return server_jwks(include_inactive=False)
@@ -712,24 +712,31 @@ require_oauth = ResourceProtector()
 
 
 def generate_access_token(client, grant_type, user, scope):
-    if grant_type == "client_credentials":
+    if (
+        grant_type == "client_credentials"
+        or current_app.config["CANAILLE_OIDC"]["ACCESS_TOKEN_FORMAT"] == "reference"
+    ):
         # Canaille could generate a JWT with iss/sub/aud/exp/iat/jti/scope/client_id
-        # instead of a random string
+        # instead of a random string for the client_credentials grant
         return gen_salt(48)
 
-    audience = [client.client_id for client in client.audience]
-    jwk, alg = _get_signing_key(client)
-    bearer_token_generator = authorization._token_generators["default"]
-    return generate_id_token(
-        token={},
-        user_info=UserInfo(generate_user_claims(user)).filter(scope),
-        aud=audience,
-        key=jwk,
-        iss=get_issuer(),
-        kid=jwk.kid,
-        alg=alg,
-        exp=bearer_token_generator._get_expires_in(client, grant_type),
+    signer = _get_signer(
+        client, current_app.config["CANAILLE_OIDC"]["ACCESS_TOKEN_SIGNING_ALGORITHMS"]
     )
+    bearer_token_generator = authorization._token_generators["default"]
+    now = int(time.time())
+    payload = {
+        "iss": get_issuer(),
+        "aud": [client.client_id for client in client.audience],
+        "iat": now,
+        "exp": now + bearer_token_generator._get_expires_in(client, grant_type),
+        "auth_time": now,
+        "jti": str(uuid.uuid4()),
+        "client_id": client.client_id,
+        "scope": scope,
+        **UserInfo(generate_user_claims(user, scope=scope)),
+    }
+    return signer.sign(payload)
 
 
 def setup_oauth(app):
@@ -786,6 +793,7 @@ def setup_oauth(app):
             )
 
     require_oauth.register_token_validator(BearerTokenValidator())
+    setup_token_cache()
 
     authorization.register_endpoint(UserInfoEndpoint(resource_protector=require_oauth))
     authorization.register_endpoint(IntrospectionEndpoint)
@@ -0,0 +1,303 @@
+import datetime
+import hashlib
+import math
+import time
+from functools import cached_property
+
+from authlib.oauth2.rfc6749 import TokenMixin
+from blinker import signal
+from flask import current_app
+
+from canaille.app import models
+from canaille.app.flask import cache
+from canaille.backends import Backend
+
+from .jose import decode_server_token
+
+TOKEN_CACHE_LIFETIME = 300
+REVOCATION_FILTER_LIFETIME = 300
+REVOCATION_FILTER_KEY = "tokens:revoked"
+REVOCATION_GENERATION_KEY = "tokens:revoked:generation"
+REVOCATION_FILTER_ERROR_RATE = 0.001
+REVOCATION_FILTER_MIN_CAPACITY = 1000
+
+
+def token_digest(access_token: str) -> str:
+    """Return the SHA-256 hex digest of an access token."""
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+def token_cache_key(access_token: str) -> str:
+    """Build the cache key of a token, from a hash of its access token."""
+    return f"token:{token_digest(access_token)}"
+
+
+def get_stored_token(access_token: str):
+    """Read the token matching an access token in the backend, by its digest."""
+    token = Backend.instance.get(
+        models.Token, access_token_digest=token_digest(access_token)
+    )
+    if token and token.access_token == access_token:
+        return token
+    return None
+
+
+def get_token_by_access_token(access_token: str):
+    """Return the token matching an access token, or :py:data:`None`.
+
+    The application cache associates the access tokens with the token ids,
+    so the next lookups read the token by its primary key instead of
+    searching the access token. The token itself is always read from the
+    backend, so revocations take effect immediately.
+
+    The cache entries last at most :data:`TOKEN_CACHE_LIFETIME` seconds,
+    never beyond the token expiration, and are invalidated whenever the
+    token is saved or deleted.
+    """
+    key = token_cache_key(access_token)
+    if token_id := cache.get(key):
+        token = Backend.instance.get(models.Token, id=token_id)
+        if token and token.access_token == access_token:
+            return token
+        cache.delete(key)
+
+    token = get_stored_token(access_token)
+    if token:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        remaining = int(token.get_expires_at() - now.timestamp())
+        if remaining > 0:
+            cache.set(key, token.id, timeout=min(TOKEN_CACHE_LIFETIME, remaining))
+
+    return token
+
+
+def update_token_digest(token, data):
+    token.access_token_digest = (
+        token_digest(token.access_token) if token.access_token else None
+    )
+
+
+def invalidate_cached_token(token, data):
+    if token.access_token:
+        cache.delete(token_cache_key(token.access_token))
+
+
+class StatelessToken(TokenMixin):
+    """An access token validated from its JWT claims, without reading the backend.
+
+    The client, the subject and the audience are only loaded on access.
+    """
+
+    revokation_date = None
+
+    def __init__(self, access_token: str, claims: dict):
+        self.access_token = access_token
+        self.claims = claims
+        self.scope = claims.get("scope", "").split()
+        self.issue_date = datetime.datetime.fromtimestamp(
+            claims["iat"], datetime.timezone.utc
+        )
+        self.lifetime = claims["exp"] - claims["iat"]
+
+    @cached_property
+    def client(self):
+        return Backend.instance.get(models.Client, client_id=self.claims["client_id"])
+
+    @cached_property
+    def subject(self):
+        if "sub" not in self.claims:
+            return None
+        return Backend.instance.get(models.User, user_name=self.claims["sub"])
+
+    @cached_property
+    def audience(self):
+        audience = self.claims.get("aud", [])
+        if isinstance(audience, str):
+            audience = [audience]
+        return Backend.instance.query(models.Client, client_id=audience)
+
+    def get_scope(self):
+        return " ".join(self.scope)
+
+    def get_issued_at(self) -> float:
+        return self.claims["iat"]
+
+    def get_expires_at(self) -> float:
+        return self.claims["exp"]
+
+    def get_expires_in(self) -> int:
+        return self.lifetime
+
+    def is_expired(self):
+        return self.get_expires_at() < time.time()
+
+    def is_revoked(self):
+        if token_digest(self.access_token) not in get_revocation_filter():
+            return False
+
+        token = get_stored_token(self.access_token)
+        return not token or token.is_revoked()
+
+    def check_client(self, client):
+        return client.client_id == self.claims["client_id"]
+
+    def get_user(self):
+        return self.subject
+
+    def get_client(self):
+        return self.client
+
+
+def get_stateless_token(access_token: str):
+    """Validate a JWT access token signed by this server, or return :py:data:`None`.
+
+    Only the tokens with the ``at+jwt`` type of :rfc:`9068` are accepted,
+    so ID tokens and client management tokens cannot be used as access tokens.
+    """
+    from .provider import get_issuer
+
+    token = decode_server_token(access_token)
+    if (
+        not token
+        or token.header.get("typ") != "at+jwt"
+        or token.claims.get("iss") != get_issuer()
+        or not {"client_id", "iat", "exp"} <= token.claims.keys()
+    ):
+        return None
+
+    return StatelessToken(access_token, token.claims)
+
+
+def authenticate_access_token(access_token: str):
+    """Return the token matching an access token presented to a resource endpoint.
+
+    With :attr:`~canaille.oidc.configuration.OIDCSettings.STATELESS_TOKEN_VALIDATION`,
+    JWT access tokens are validated locally with :func:`get_stateless_token`.
+    The other tokens are read with :func:`get_token_by_access_token`.
+    """
+    if (
+        current_app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"]
+        and access_token.count(".") == 2
+    ):
+        return get_stateless_token(access_token)
+
+    return get_token_by_access_token(access_token)
+
+
+class RevocationFilter:
+    """A Bloom filter of revoked access token digests.
+
+    A token missing from the filter is certainly not revoked. A token found
+    in the filter is probably revoked: this is wrong for about
+    :data:`REVOCATION_FILTER_ERROR_RATE` of the tokens while the filter holds
+    less than ``capacity`` tokens, so positive answers must be confirmed.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = REVOCATION_FILTER_ERROR_RATE):
+        capacity = max(capacity, REVOCATION_FILTER_MIN_CAPACITY)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, digest: str):
+        # the digests are SHA-256 hashes already, two slices of them are
+        # combined to compute the positions instead of hashing them again
+        raw = bytes.fromhex(digest)
+        first = int.from_bytes(raw[:8], "big")
+        second = int.from_bytes(raw[8:16], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, digest: str) -> None:
+        for position in self.positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(digest)
+        )
+
+
+def build_revocation_filter() -> RevocationFilter:
+    """Build the filter of the revoked tokens from the backend.
+
+    The expired tokens are left out.
+    """
+    now = time.time()
+    tokens = Backend.instance.iter_query(
+        models.Token,
+        batch_size=500,
+        fields=["access_token_digest", "revokation_date", "issue_date", "lifetime"],
+    )
+    digests = [
+        token.access_token_digest
+        for token in tokens
+        if token.revokation_date
+        and token.access_token_digest
+        and token.get_expires_at() > now
+    ]
+    revoked = RevocationFilter(len(digests))
+    for digest in digests:
+        revoked.add(digest)
+    return revoked
+
+
+def get_revocation_filter() -> RevocationFilter:
+    """Return the filter of the revoked access tokens.
+
+    The filter is kept in the application for at most
+    :data:`REVOCATION_FILTER_LIFETIME` seconds, and shared through the
+    application cache. Revoking a token adds it to the shared filter and
+    increments a generation counter, so the workers sharing the cache
+    notice the change without reading the backend.
+    """
+    generation = cache.get(REVOCATION_GENERATION_KEY) or 0
+    now = time.monotonic()
+    local = current_app.extensions.get("canaille_oidc_revocations")
+    if local and local[0] == generation and now - local[1] < REVOCATION_FILTER_LIFETIME:
+        return local[2]
+
+    revoked = cache.get(REVOCATION_FILTER_KEY)
+    if revoked is None:
+        revoked = build_revocation_filter()
+        cache.set(REVOCATION_FILTER_KEY, revoked, timeout=REVOCATION_FILTER_LIFETIME)
+
+    current_app.extensions["canaille_oidc_revocations"] = (generation, now, revoked)
+    return revoked
+
+
+def revoke_cached_token(token, data):
+    if (
+        not token.revokation_date
+        or not token.access_token
+        or not current_app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"]
+    ):
+        return
+
+    digest = token_digest(token.access_token)
+    revoked = cache.get(REVOCATION_FILTER_KEY)
+    if revoked is not None:
+        if digest in revoked:
+            return
+
+        revoked.add(digest)
+        cache.set(REVOCATION_FILTER_KEY, revoked, timeout=REVOCATION_FILTER_LIFETIME)
+
+    current_app.extensions.pop("canaille_oidc_revocations", None)
+    generation = cache.get(REVOCATION_GENERATION_KEY) or 0
+    cache.set(REVOCATION_GENERATION_KEY, generation + 1, timeout=0)
+
+
+def setup_token_cache():
+    teardown_token_cache()
+    signal("before_token_save").connect(update_token_digest)
+    signal("after_token_save").connect(invalidate_cached_token)
+    signal("after_token_save").connect(revoke_cached_token)
+    signal("before_token_delete").connect(invalidate_cached_token)
+
+
+def teardown_token_cache():
+    signal("before_token_save").disconnect(update_token_digest)
+    signal("after_token_save").disconnect(invalidate_cached_token)
+    signal("after_token_save").disconnect(revoke_cached_token)
+    signal("before_token_delete").disconnect(invalidate_cached_token)
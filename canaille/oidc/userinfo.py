@@ -1,5 +1,7 @@
+from authlib.oauth2.rfc6749.util import scope_to_list
 from authlib.oidc import core as oidc_core
 from flask import current_app
+from jinja2 import nodes
 
 
 class UserInfo(oidc_core.UserInfo):
@@ -10,47 +12,116 @@ class UserInfo(oidc_core.UserInfo):
     }
 
 
+ADDRESS_ATTRIBUTES = {
+    "formatted_address": "formatted",
+    "street": "street_address",
+    "locality": "locality",
+    "region": "region",
+    "postal_code": "postal_code",
+}
+
+
 def make_address_claim(user):
     payload = {}
-    mapping = {
-        "formatted_address": "formatted",
-        "street": "street_address",
-        "locality": "locality",
-        "region": "region",
-        "postal_code": "postal_code",
-    }
-    for user_attr, claim in mapping.items():
+    for user_attr, claim in ADDRESS_ATTRIBUTES.items():
         if val := getattr(user, user_attr):
             payload[claim] = val
 
     return payload
 
 
-def generate_user_claims(user, jwt_mapping_config=None):
-    jwt_mapping_config = {
+def template_attributes(template_ast):
+    """Return the names of the ``user`` attributes read by a template."""
+    return frozenset(
+        node.attr
+        for node in template_ast.find_all(nodes.Getattr)
+        if isinstance(node.node, nodes.Name) and node.node.name == "user"
+    )
+
+
+class ClaimTemplates:
+    """The compiled templates of a claims mapping.
+
+    The templates are compiled once, and the user attributes each claim
+    reads are resolved beforehand, so rendering the claims of a scope only
+    touches the attributes of the requested claims.
+    """
+
+    def __init__(self, env, mapping):
+        self.templates = {}
+        self.attributes = {
+            "address": frozenset(ADDRESS_ATTRIBUTES),
+            "groups": frozenset({"groups"}),
+        }
+        for claim in UserInfo.REGISTERED_CLAIMS:
+            if raw_claim := mapping.get(claim.upper()):
+                template_ast = env.parse(raw_claim)
+                self.templates[claim] = env.from_string(template_ast)
+                self.attributes[claim] = self.attributes.get(
+                    claim, frozenset()
+                ) | template_attributes(template_ast)
+
+    @staticmethod
+    def scope_claims(scope):
+        """Return the claims requested by a scope, in the registered order."""
+        requested = {
+            claim
+            for scope_part in scope_to_list(scope)
+            for claim in UserInfo.SCOPES_CLAIMS_MAPPING.get(scope_part, [])
+        }
+        return [claim for claim in UserInfo.REGISTERED_CLAIMS if claim in requested]
+
+    def scope_attributes(self, scope):
+        """Return the user attributes needed to render the claims of a scope."""
+        return frozenset().union(
+            *(self.attributes.get(claim, ()) for claim in self.scope_claims(scope))
+        )
+
+    def render(self, user, scope=None):
+        claims = (
+            UserInfo.REGISTERED_CLAIMS if scope is None else self.scope_claims(scope)
+        )
+        data = {}
+        for claim in claims:
+            if template := self.templates.get(claim):
+                formatted_claim = template.render(user=user)
+                if formatted_claim:
+                    # According to https://openid.net/specs/openid-connect-core-1_0.html#UserInfoResponse
+                    # it's better to not insert a null or empty string value
+                    data[claim] = formatted_claim
+
+            if claim == "address" and (address := make_address_claim(user)):
+                data[claim] = address
+
+            if claim == "groups" and user.groups:
+                data[claim] = [group.display_name for group in user.groups]
+
+            if claim == "updated_at" and claim in data:
+                data[claim] = int(float(data[claim]))
+
+        return data
+
+
+def get_claim_templates(jwt_mapping_config=None):
+    """Return the compiled claim templates for the current configuration.
+
+    The templates are compiled once per distinct mapping, so per-client
+    ``jwt_mapping_config`` overrides are compiled once too.
+    """
+    mapping = {
         **(current_app.config["CANAILLE_OIDC"]["USERINFO_MAPPING"]),
         **(jwt_mapping_config or {}),
     }
+    key = frozenset(mapping.items())
+    cache = current_app.extensions.setdefault("canaille_oidc_claim_templates", {})
+    if (templates := cache.get(key)) is None:
+        templates = cache[key] = ClaimTemplates(current_app.jinja_env, mapping)
+    return templates
 
-    data = {}
-    for claim in UserInfo.REGISTERED_CLAIMS:
-        raw_claim = jwt_mapping_config.get(claim.upper())
-        if raw_claim:
-            formatted_claim = current_app.jinja_env.from_string(raw_claim).render(
-                user=user
-            )
-            if formatted_claim:
-                # According to https://openid.net/specs/openid-connect-core-1_0.html#UserInfoResponse
-                # it's better to not insert a null or empty string value
-                data[claim] = formatted_claim
-
-        if claim == "address" and (address := make_address_claim(user)):
-            data[claim] = address
-
-        if claim == "groups" and user.groups:
-            data[claim] = [group.display_name for group in user.groups]
 
-        if claim == "updated_at":
-            data[claim] = int(float(data[claim]))
+def generate_user_claims(user, jwt_mapping_config=None, scope=None):
+    """Render the claims of a user.
 
-    return data
+    If ``scope`` is set, only the claims requested by the scope are rendered.
+    """
+    return get_claim_templates(jwt_mapping_config).render(user, scope)
@@ -20,8 +20,10 @@ SCOPE_DETAILS = {
 }
 
 
-def fetch_document(url: str, max_size: int = MAX_DOCUMENT_SIZE) -> str:
-    """Download a document at a URI a client indicated.
+def fetch_response(
+    url: str, max_size: int = MAX_DOCUMENT_SIZE
+) -> tuple[str, httpx.Headers]:
+    """Download a document at a URI a client indicated, along with the response headers.
 
     ``Content-Length`` is only trusted to bail out early, as servers can omit it
     or lie about it. The body is then read in chunks of *max_size*: getting a
@@ -45,7 +47,16 @@ def fetch_document(url: str, max_size: int = MAX_DOCUMENT_SIZE) -> str:
         if next(chunks, None) is not None:
             raise ValueError(too_big)
 
-    return content.decode()
+    return content.decode(), response.headers
+
+
+def fetch_document(url: str, max_size: int = MAX_DOCUMENT_SIZE) -> str:
+    """Download a document at a URI a client indicated.
+
+    See :func:`fetch_response`.
+    """
+    content, _ = fetch_response(url, max_size)
+    return content
 
 
 def unique_scopes(scope):
@@ -199,7 +199,7 @@ def get_clients_to_notify(user):
     consented_clients = {t.client for t in consents}
     trusted_clients = [
         client
-        for client in Backend.instance.query(models.Client)
+        for client in Backend.instance.iter_query(models.Client)
         if client.trusted and client not in consented_clients
     ]
     return list(consented_clients) + list(trusted_clients)
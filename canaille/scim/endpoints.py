@@ -15,11 +15,13 @@ from flask import request
 from pydantic import ValidationError
 from scim2_models import Context
 from scim2_models import Error
+from scim2_models import InvalidFilterException
 from scim2_models import ListResponse
 from scim2_models import PatchOp
 from scim2_models import ResourceType
 from scim2_models import ResponseParameters
 from scim2_models import Schema
+from scim2_models import SCIMException
 from scim2_models import SearchRequest
 from werkzeug.exceptions import HTTPException
 from werkzeug.exceptions import PreconditionFailed
@@ -28,12 +30,16 @@ from canaille.app import models
 from canaille.app.flask import csrf
 from canaille.backends import Backend
 from canaille.core.configuration import Permission
+from canaille.oidc.tokens import authenticate_access_token
 
 from .casting import group_from_canaille_to_scim_server
 from .casting import group_from_scim_to_canaille
 from .casting import make_etag
 from .casting import user_from_canaille_to_scim_server
 from .casting import user_from_scim_to_canaille
+from .filter import NOTHING
+from .filter import scim_filter_to_where
+from .models import MAX_ITEMS_PER_PAGE
 from .models import EnterpriseUser
 from .models import Group
 from .models import User
@@ -46,7 +52,7 @@ bp = Blueprint("scim", __name__, url_prefix="/scim/v2")
 
 class SCIMBearerTokenValidator(BearerTokenValidator):
     def authenticate_token(self, token_string: str):
-        return Backend.instance.get(models.Token, access_token=token_string)
+        return authenticate_access_token(token_string)
 
 
 require_oauth = ResourceProtector()
@@ -132,17 +138,20 @@ def scim_error_handler(error):
     return obj.model_dump(), obj.status
 
 
+@bp.errorhandler(SCIMException)
+def scim_exception_handler(error):
+    obj = error.to_error()
+    return obj.model_dump(), obj.status
+
+
 def parse_search_request(request) -> SearchRequest:
     """Create a SearchRequest object from the request arguments."""
-    max_nb_items_per_page = 1000
-    count = (
-        min(request.args["count"], max_nb_items_per_page)
-        if request.args.get("count")
-        else None
-    )
+    count = request.args.get("count", type=int)
+    count = min(count, MAX_ITEMS_PER_PAGE) if count is not None else None
     req = SearchRequest(
         attributes=request.args.get("attributes"),
         excluded_attributes=request.args.get("excludedAttributes"),
+        filter=request.args.get("filter"),
         start_index=request.args.get("startIndex"),
         count=count,
     )
@@ -151,9 +160,10 @@ def parse_search_request(request) -> SearchRequest:
 
 def _query_resources(canaille_model, scim_type, to_scim):
     req = parse_search_request(request)
-    total = Backend.instance.count(canaille_model)
-    resources = list(
-        Backend.instance.query(canaille_model)[req.start_index_0 : req.stop_index_0]
+    where = scim_filter_to_where(req.filter, canaille_model) if req.filter else None
+    total = Backend.instance.count(canaille_model, where=where)
+    resources = Backend.instance.query(
+        canaille_model, offset=req.start_index_0, limit=req.count, where=where
     )
     scim_resources = [to_scim(r) for r in resources]
     list_response = ListResponse[scim_type](
@@ -352,18 +362,47 @@ def query_service_provider_config():
     return spc.model_dump(scim_ctx=Context.RESOURCE_QUERY_RESPONSE)
 
 
+def search_filters(filter):
+    """Translate a filter for the users and the groups.
+
+    Comparisons on attributes that only one resource type has match nothing
+    on the other resource type. Filters that are invalid for both resource
+    types are rejected.
+    """
+    if not filter:
+        return None, None
+
+    errors = []
+    for model in (models.User, models.Group):
+        try:
+            scim_filter_to_where(filter, model)
+        except InvalidFilterException as exc:
+            errors.append(exc)
+
+    if len(errors) == 2:
+        raise errors[0]
+
+    return (
+        scim_filter_to_where(filter, models.User, unknown=NOTHING),
+        scim_filter_to_where(filter, models.Group, unknown=NOTHING),
+    )
+
+
 @bp.route("/.search", methods=["POST"])
 @csrf.exempt
 @require_oauth()
 @require_permission(Permission.MANAGE_USERS)
 def search():
     req = SearchRequest.model_validate(request.json)
-    total = Backend.instance.count(models.User) + Backend.instance.count(models.Group)
-    users = list(
-        Backend.instance.query(models.User)[req.start_index_0 : req.stop_index_0]
+    user_where, group_where = search_filters(req.filter)
+    total = Backend.instance.count(
+        models.User, where=user_where
+    ) + Backend.instance.count(models.Group, where=group_where)
+    users = Backend.instance.query(
+        models.User, offset=req.start_index_0, limit=req.count, where=user_where
     )
-    groups = list(
-        Backend.instance.query(models.Group)[req.start_index_0 : req.stop_index_0]
+    groups = Backend.instance.query(
+        models.Group, offset=req.start_index_0, limit=req.count, where=group_where
     )
     scim_users = [user_from_canaille_to_scim_server(user) for user in users]
     scim_groups = [group_from_canaille_to_scim_server(group) for group in groups]
@@ -0,0 +1,286 @@
+"""SCIM filters, as defined in :rfc:`7644#section-3.4.2.2`.
+
+Filters are parsed, then translated into :mod:`~canaille.backends.filters`
+trees on the Canaille model attributes, so the backends perform the
+filtering with their indexes.
+"""
+
+import datetime
+import json
+import re
+
+from scim2_models import InvalidFilterException
+
+from canaille.app import models
+from canaille.backends import Backend
+from canaille.backends.filters import OPERATORS
+from canaille.backends.filters import And
+from canaille.backends.filters import Comparison
+from canaille.backends.filters import Not
+from canaille.backends.filters import Or
+from canaille.backends.models import get_root_type
+
+CORE_SCHEMA_PREFIX = "urn:ietf:params:scim:schemas:core:2.0:"
+ENTERPRISE_USER_SCHEMA = "urn:ietf:params:scim:schemas:extension:enterprise:2.0:user"
+
+USER_ATTRIBUTES = {
+    "id": "id",
+    "username": "user_name",
+    "displayname": "display_name",
+    "title": "title",
+    "preferredlanguage": "preferred_language",
+    "profileurl": "profile_url",
+    "name.formatted": "formatted_name",
+    "name.familyname": "family_name",
+    "name.givenname": "given_name",
+    "emails": "emails",
+    "emails.value": "emails",
+    "phonenumbers": "phone_numbers",
+    "phonenumbers.value": "phone_numbers",
+    "addresses.formatted": "formatted_address",
+    "addresses.streetaddress": "street",
+    "addresses.postalcode": "postal_code",
+    "addresses.locality": "locality",
+    "addresses.region": "region",
+    "meta.created": "created",
+    "meta.lastmodified": "last_modified",
+    f"{ENTERPRISE_USER_SCHEMA}:employeenumber": "employee_number",
+    f"{ENTERPRISE_USER_SCHEMA}:organization": "organization",
+    f"{ENTERPRISE_USER_SCHEMA}:department": "department",
+}
+
+GROUP_ATTRIBUTES = {
+    "id": "id",
+    "displayname": "display_name",
+    "meta.created": "created",
+    "meta.lastmodified": "last_modified",
+}
+
+NOTHING = Not(Comparison("id", "pr"))
+"""A filter that matches no resource, as every resource has an identifier."""
+
+TOKEN_RE = re.compile(r'\s*(?:("(?:[^"\\]|\\.)*")|([()\[\]])|([^\s()\[\]"]+))')
+
+
+def tokenize(filter: str) -> list[str]:
+    tokens = []
+    position = 0
+    filter = filter.rstrip()
+    while position < len(filter):
+        match = TOKEN_RE.match(filter, position)
+        if not match or not match.group(0).strip():
+            raise InvalidFilterException(filter=filter)
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+class FilterParser:
+    """Parse a SCIM filter into a tree of comparisons on SCIM attribute paths.
+
+    ``not`` binds tighter than ``and``, which binds tighter than ``or``.
+    Value path filters such as ``emails[value co "example"]`` are expanded
+    into comparisons on the sub-attributes.
+    """
+
+    def __init__(self, filter: str):
+        self.filter = filter
+        self.tokens = tokenize(filter)
+        self.position = 0
+
+    def error(self):
+        return InvalidFilterException(filter=self.filter)
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise self.error()
+        self.position += 1
+        return token
+
+    def expect(self, expected):
+        if self.next() != expected:
+            raise self.error()
+
+    def is_keyword(self, keyword):
+        token = self.peek()
+        return token is not None and token.lower() == keyword
+
+    def parse(self):
+        tree = self.parse_or()
+        if self.peek() is not None:
+            raise self.error()
+        return tree
+
+    def parse_or(self, prefix=None):
+        operands = [self.parse_and(prefix)]
+        while self.is_keyword("or"):
+            self.next()
+            operands.append(self.parse_and(prefix))
+        return operands[0] if len(operands) == 1 else Or(operands)
+
+    def parse_and(self, prefix=None):
+        operands = [self.parse_not(prefix)]
+        while self.is_keyword("and"):
+            self.next()
+            operands.append(self.parse_not(prefix))
+        return operands[0] if len(operands) == 1 else And(operands)
+
+    def parse_not(self, prefix=None):
+        if self.is_keyword("not"):
+            self.next()
+            self.expect("(")
+            tree = Not(self.parse_or(prefix))
+            self.expect(")")
+            return tree
+
+        if self.peek() == "(":
+            self.next()
+            tree = self.parse_or(prefix)
+            self.expect(")")
+            return tree
+
+        return self.parse_comparison(prefix)
+
+    def parse_comparison(self, prefix=None):
+        path = self.next()
+        if path in ("(", ")", "[", "]") or path.startswith('"'):
+            raise self.error()
+
+        if prefix:
+            path = f"{prefix}.{path}"
+
+        if self.peek() == "[":
+            if prefix:
+                raise self.error()
+            self.next()
+            tree = self.parse_or(prefix=path)
+            self.expect("]")
+            return tree
+
+        operator = self.next().lower()
+        if operator == "pr":
+            return Comparison(path, "pr")
+
+        if operator not in OPERATORS:
+            raise self.error()
+
+        return Comparison(path, operator, self.parse_value())
+
+    def parse_value(self):
+        token = self.next()
+        if token.startswith('"'):
+            return json.loads(token)
+
+        if token.lower() in ("true", "false", "null"):
+            return json.loads(token.lower())
+
+        try:
+            return json.loads(token)
+        except ValueError:
+            raise self.error() from None
+
+
+def parse_filter(filter: str):
+    """Parse a SCIM filter string.
+
+    :raises InvalidFilterException: when the filter is not valid.
+    """
+    return FilterParser(filter).parse()
+
+
+def attribute_key(path: str) -> str:
+    key = path.lower()
+    for schema in (
+        f"{CORE_SCHEMA_PREFIX}user:",
+        f"{CORE_SCHEMA_PREFIX}group:",
+    ):
+        if key.startswith(schema):
+            return key[len(schema) :]
+    return key
+
+
+def translate(tree, model, attributes, filter, unknown=None):
+    """Translate a parsed SCIM filter into a filter on a Canaille model."""
+    if isinstance(tree, And | Or):
+        return type(tree)(
+            [
+                translate(operand, model, attributes, filter, unknown)
+                for operand in tree.operands
+            ]
+        )
+
+    if isinstance(tree, Not):
+        return Not(translate(tree.operand, model, attributes, filter, unknown))
+
+    key = attribute_key(tree.attribute)
+    if key == "active" and model is models.User:
+        return translate_active(tree, filter)
+
+    if key == "externalid":
+        # Canaille does not store the identifiers given by the SCIM clients
+        return NOTHING
+
+    if key not in attributes and unknown is not None:
+        return unknown
+
+    if key not in attributes:
+        raise InvalidFilterException(
+            filter=filter, detail=f"Unsupported filter attribute '{tree.attribute}'"
+        )
+
+    attribute = attributes[key]
+    value = tree.value
+    annotation, _ = get_root_type(model.attributes[attribute])
+
+    if tree.operator != "pr" and value is not None:
+        value = cast_value(value, annotation, filter)
+
+    try:
+        return Comparison(attribute, tree.operator, value)
+    except ValueError:
+        raise InvalidFilterException(filter=filter) from None
+
+
+def cast_value(value, annotation, filter):
+    if annotation is datetime.datetime:
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidFilterException(filter=filter) from None
+
+    if annotation is str and not isinstance(value, str):
+        raise InvalidFilterException(filter=filter)
+
+    return value
+
+
+def translate_active(tree, filter):
+    """Users are active when they have no lock date."""
+    if tree.operator not in ("eq", "ne") or not isinstance(tree.value, bool):
+        raise InvalidFilterException(filter=filter)
+
+    locked = Comparison("lock_date", "pr")
+    active = tree.value if tree.operator == "eq" else not tree.value
+    return Not(locked) if active else locked
+
+
+def scim_filter_to_where(filter: str, model, unknown=None):
+    """Parse a SCIM filter and translate it into a filter on a Canaille model.
+
+    Comparisons on attributes the model does not have are replaced by
+    *unknown* if it is set.
+
+    :raises InvalidFilterException: when the filter is not valid, or compares
+        attributes that cannot be filtered.
+    """
+    attributes = USER_ATTRIBUTES if model is models.User else GROUP_ATTRIBUTES
+    where = translate(parse_filter(filter), model, attributes, filter, unknown)
+    try:
+        Backend.check_where(model, where)
+    except ValueError as exc:
+        raise InvalidFilterException(filter=filter, detail=str(exc)) from None
+    return where
@@ -34,6 +34,9 @@ from scim2_models import Uniqueness
 
 from canaille.app import DOCUMENTATION_URL
 
+MAX_ITEMS_PER_PAGE = 1000
+"""The maximum number of resources returned in a list response."""
+
 
 class Name(ComplexAttribute):
     formatted: Annotated[str | None, Required.true] = None
@@ -235,7 +238,7 @@ def get_service_provider_config():
         patch=Patch(supported=True),
         bulk=Bulk(supported=False, max_operations=0, max_payload_size=0),
         change_password=ChangePassword(supported=True),
-        filter=Filter(supported=False, max_results=0),
+        filter=Filter(supported=True, max_results=MAX_ITEMS_PER_PAGE),
         sort=Sort(supported=False),
         etag=ETag(supported=True),
         authentication_schemes=[
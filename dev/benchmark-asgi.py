@@ -0,0 +1,80 @@
+"""Compare the native ASGI serving of the protocol endpoints with the WSGI bridge.
+
+The requests are sent in-process with httpx, so the figures measure the
+application and the ASGI adapters, and not the network.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+import click
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+
+from canaille.hypercorn.app import create_app
+from canaille.hypercorn.asgi import ASGIApplication
+
+ENDPOINTS = [
+    ("GET", "/.well-known/openid-configuration", {}),
+    ("GET", "/oauth/jwks.json", {}),
+    ("POST", "/oauth/token", {"data": {"grant_type": "client_credentials"}}),
+]
+
+
+def build_app():
+    os.environ["AUTHLIB_INSECURE_TRANSPORT"] = "true"
+    config = {
+        "SECRET_KEY": "benchmark",
+        "SERVER_NAME": "canaille.test",
+        "CANAILLE": {
+            "DATABASE": "memory",
+            "LOGGING": {"version": 1, "root": {"level": "ERROR"}},
+        },
+        "CANAILLE_OIDC": {},
+        "CANAILLE_HYPERCORN": {},
+    }
+    return create_app(config=config, wrap_asgi=False)
+
+
+async def run(asgi_app, method, url, kwargs, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://canaille.test"
+    ) as client:
+
+        async def send():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.request(method, url, **kwargs)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(requests)))
+        duration = time.perf_counter() - start
+
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return requests / duration, p99 * 1000
+
+
+@click.command()
+@click.option("--requests", default=2000, help="Number of requests per endpoint.")
+@click.option("--concurrency", default=50, help="Number of concurrent requests.")
+def benchmark(requests, concurrency):
+    app = build_app()
+    apps = {"bridge": WsgiToAsgi(app), "native": ASGIApplication(app)}
+
+    click.echo(f"{'endpoint':<40}{'mode':<8}{'req/s':>10}{'p99 (ms)':>10}")
+    for method, url, kwargs in ENDPOINTS:
+        for mode, asgi_app in apps.items():
+            rate, p99 = asyncio.run(
+                run(asgi_app, method, url, kwargs, requests, concurrency)
+            )
+            click.echo(f"{method + ' ' + url:<40}{mode:<8}{rate:>10.0f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,77 @@
+import threading
+
+from canaille import create_app
+from canaille.app.cache import cache_metrics
+from canaille.app.cache import get_or_build
+from canaille.app.flask import cache
+
+
+def test_get_or_build(app):
+    """Test that built values are cached, and that hits and misses are counted."""
+    calls = []
+
+    def build():
+        calls.append(None)
+        return "value", 60
+
+    assert get_or_build("key", build, namespace="test") == "value"
+    assert get_or_build("key", build, namespace="test") == "value"
+    assert len(calls) == 1
+    assert cache_metrics()["test", "misses"] == 1
+    assert cache_metrics()["test", "hits"] == 1
+    assert cache.get("lock:key") is None
+
+
+def test_get_or_build_uncacheable(app):
+    """Test that values built with a None timeout are not cached."""
+    calls = []
+
+    def build():
+        calls.append(None)
+        return "value", None
+
+    assert get_or_build("key", build, namespace="test") == "value"
+    assert get_or_build("key", build, namespace="test") == "value"
+    assert len(calls) == 2
+    assert cache_metrics()["test", "misses"] == 2
+
+
+def test_get_or_build_waits_for_the_lock(app):
+    """Test that a locked key is not built again, but read when it is ready."""
+    cache.add("lock:key", 1)
+
+    def release():
+        with app.app_context():
+            cache.set("key", "built elsewhere")
+            cache.delete("lock:key")
+
+    timer = threading.Timer(0.1, release)
+    timer.start()
+
+    def build():
+        raise AssertionError
+
+    assert get_or_build("key", build, namespace="test") == "built elsewhere"
+    timer.join()
+
+
+def test_get_or_build_lock_timeout(app):
+    """Test that a value is built anyway when the lock is held for too long."""
+    cache.add("lock:key", 1)
+
+    assert get_or_build("key", lambda: ("value", 60), "test", wait=0.1) == "value"
+    assert cache.get("key") is None
+
+
+def test_filesystem_cache_is_shared(configuration, backend, tmp_path):
+    """Test that FileSystemCache shares the entries between several applications."""
+    configuration["CACHE_TYPE"] = "FileSystemCache"
+    configuration["CACHE_DIR"] = str(tmp_path)
+    first = create_app(configuration, backend=backend)
+    second = create_app(configuration, backend=backend)
+
+    with first.app_context():
+        assert cache.add("jti:client-1234", 1)
+
+    with second.app_context():
+        assert not cache.add("jti:client-1234", 1)
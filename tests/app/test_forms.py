@@ -8,7 +8,9 @@ from babel.dates import LOCALTZ
 from flask import current_app
 from werkzeug.datastructures import ImmutableMultiDict
 
+from canaille.app import models
 from canaille.app.forms import DateTimeUTCField
+from canaille.app.forms import TableForm
 from canaille.app.forms import compromised_password_validator
 from canaille.app.forms import password_length_validator
 from canaille.app.forms import password_too_long_validator
@@ -413,3 +415,26 @@ def test_compromised_password_validator_with_failure_of_api_request_without_form
         logging.ERROR,
         "Password compromise investigation failed on HIBP API.",
     ) not in caplog.record_tuples
+
+
+def test_table_form_pagination(testclient, user, admin, moderator):
+    """Test that table forms only display the items of the requested page."""
+    with testclient.app.test_request_context():
+        first_page = TableForm(
+            models.User, page_size=2, formdata=ImmutableMultiDict({"page": "1"})
+        )
+        second_page = TableForm(
+            models.User, page_size=2, formdata=ImmutableMultiDict({"page": "2"})
+        )
+
+    assert first_page.nb_items == 3
+    assert first_page.page_max == 2
+    assert len(first_page.items_slice) == 2
+    assert second_page.nb_items == 3
+    assert second_page.page_max == 2
+    assert len(second_page.items_slice) == 1
+    assert set(first_page.items_slice) | set(second_page.items_slice) == {
+        user,
+        admin,
+        moderator,
+    }
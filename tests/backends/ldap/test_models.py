@@ -1,3 +1,6 @@
+import asyncio
+from unittest import mock
+
 from canaille.app import models
 
 
@@ -24,3 +27,126 @@ def test_model_references_set_unsaved_object(
     testclient.get("/groups/foo", status=200)
 
     backend.delete(group)
+
+
+def test_query_pages_with_small_page_size(testclient, user, admin, moderator, backend):
+    """Sorted pages are fetched over several Simple Paged Results round-trips."""
+    backend.engine.page_size = 1
+    try:
+        assert backend.query(models.User, order_by="user_name") == [
+            admin,
+            moderator,
+            user,
+        ]
+        assert backend.query(models.User, order_by="user_name", offset=1, limit=1) == [
+            moderator
+        ]
+        assert (
+            list(backend.query(models.User, offset=1, limit=2))
+            == list(backend.query(models.User))[1:3]
+        )
+    finally:
+        backend.engine.page_size = 500
+
+
+def test_query_sort_fallback_without_server_sorting(
+    testclient, user, admin, moderator, backend
+):
+    """Entries are sorted by the client when the server cannot sort them."""
+    import ldap
+
+    def unavailable_search(*args, **kwargs):
+        raise ldap.UNAVAILABLE_CRITICAL_EXTENSION()
+        yield
+
+    with mock.patch.object(backend.engine, "_paged_search", unavailable_search):
+        assert backend.query(models.User, order_by="user_name") == [
+            admin,
+            moderator,
+            user,
+        ]
+        assert backend.query(
+            models.User, order_by="user_name", descending=True, limit=2
+        ) == [user, moderator]
+        assert (
+            backend.query(models.User, order_by="display_name", offset=1)
+            == list(backend.query(models.User, order_by="display_name"))[1:]
+        )
+
+
+def test_dereference_references_at_once(testclient, backend, user, admin):
+    """DN references of a result set are fetched in a single search, once per request."""
+    foo = models.Group(members=[user, admin], display_name="foo")
+    bar = models.Group(members=[admin], display_name="bar")
+    backend.save_many([foo, bar])
+
+    with testclient.app.test_request_context():
+        with mock.patch.object(
+            backend.engine, "get_many", wraps=backend.engine.get_many
+        ) as get_many:
+            groups = backend.query(models.Group)
+            members = {group.display_name: set(group.members) for group in groups}
+            assert members == {"foo": {user, admin}, "bar": {admin}}
+            assert get_many.call_count == 1
+
+            assert backend.get(models.Group, display_name="bar").members == [admin]
+            assert get_many.call_count == 1
+
+    backend.delete_many([foo, bar])
+
+
+def test_query_fields_attrlist(testclient, backend, user):
+    """Only the requested attributes are fetched from the directory."""
+    assert backend.engine.attrlist(models.User, ["user_name"]) == [
+        "entryUUID",
+        "objectClass",
+        "uid",
+    ]
+
+    with mock.patch.object(backend.engine, "load", wraps=backend.engine.load) as load:
+        instance = backend.get(models.User, user_name="user", fields=["user_name"])
+        assert "mail" not in instance._stored
+        assert load.call_count == 0
+
+        assert instance.emails == user.emails
+        assert load.call_count == 1
+
+
+def test_pipeline_concurrent_operations(testclient, backend, user, admin, foo_group):
+    """Concurrent awaitable operations are all sent before reading the answers."""
+    calls = []
+
+    async def lookups():
+        async with backend.engine.pipeline() as pipeline:
+            conn = pipeline.conn
+            with (
+                mock.patch.object(
+                    conn,
+                    "search_ext",
+                    side_effect=lambda *args, **kwargs: (
+                        calls.append("search")
+                        or conn.__class__.search_ext(conn, *args, **kwargs)
+                    ),
+                ),
+                mock.patch.object(
+                    conn,
+                    "result3",
+                    side_effect=lambda *args, **kwargs: (
+                        calls.append("result")
+                        or conn.__class__.result3(conn, *args, **kwargs)
+                    ),
+                ),
+            ):
+                return await asyncio.gather(
+                    pipeline.get(models.User, user_name="user"),
+                    pipeline.query(models.Group, members=user),
+                    pipeline.count(models.User),
+                    pipeline.get(models.User, user_name="invalid"),
+                )
+
+    found, groups, count, missing = asyncio.run(lookups())
+    assert found == user
+    assert list(groups) == [foo_group]
+    assert count == 2
+    assert missing is None
+    assert calls[:4] == ["search"] * 4
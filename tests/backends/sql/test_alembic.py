@@ -1,3 +1,8 @@
+import hashlib
+
+import sqlalchemy as sa
+
+
 def test_migrations(app, backend):
     """Test downgrading back to the first revision, and then re-apply all migrations."""
     backend.alembic.downgrade("base")
@@ -33,3 +38,29 @@ def test_migrations_with_data(app, backend, user, foo_group):
     assert user.user_name == original_user_name
     assert foo_group.display_name == original_group_name
     assert len(foo_group.members) == original_group_members
+
+
+def test_access_token_digest_migration(app, backend):
+    """Test that the upgrade computes the digests of the existing access tokens."""
+    backend.db_session.commit()
+    backend.alembic.downgrade("1785442300")
+
+    with backend.engine.begin() as connection:
+        connection.execute(sa.text("INSERT INTO client (id) VALUES ('client')"))
+        connection.execute(
+            sa.text(
+                "INSERT INTO token (id, access_token, client_id) "
+                "VALUES ('token', 'access-token', 'client')"
+            )
+        )
+
+    backend.alembic.upgrade()
+
+    with backend.engine.begin() as connection:
+        digest = connection.execute(
+            sa.text("SELECT access_token_digest FROM token WHERE id = 'token'")
+        ).scalar()
+        connection.execute(sa.text("DELETE FROM token WHERE id = 'token'"))
+        connection.execute(sa.text("DELETE FROM client WHERE id = 'client'"))
+
+    assert digest == hashlib.sha256(b"access-token").hexdigest()
@@ -1,9 +1,14 @@
 import datetime
+from unittest import mock
 
 import pytest
 import time_machine
 
 from canaille.app import models
+from canaille.backends.filters import And
+from canaille.backends.filters import Comparison
+from canaille.backends.filters import Not
+from canaille.backends.filters import Or
 
 
 def test_model_comparison(testclient, backend):
@@ -154,6 +159,236 @@ def test_count(testclient, user, backend):
     assert backend.count(models.User, family_name="nonexistent_xyz") == 0
 
 
+def test_exists(testclient, user, backend):
+    """Test that exists indicates whether an entry matches."""
+    assert backend.exists(models.User)
+    assert backend.exists(models.User, family_name=user.family_name)
+    assert backend.exists(models.User, emails=user.emails[0])
+    assert not backend.exists(models.User, family_name="nonexistent_xyz")
+
+
+def test_first(testclient, user, moderator, backend):
+    """Test that first returns one matching entry, or None."""
+    assert backend.first(models.User, user_name="user") == user
+    assert backend.first(models.User, emails=user.emails[0]) == user
+    assert backend.first(models.User) in (user, moderator)
+    assert backend.first(models.User, family_name="nonexistent_xyz") is None
+
+    instance = backend.first(models.User, user_name="user", fields=["user_name"])
+    assert instance.user_name == "user"
+    assert instance.family_name == user.family_name
+
+
+def test_query_where(testclient, user, moderator, admin, backend):
+    """Test that queries can be filtered with comparisons."""
+
+    def user_names(where):
+        assert backend.count(models.User, where=where) == len(
+            backend.query(models.User, where=where)
+        )
+        return sorted(u.user_name for u in backend.query(models.User, where=where))
+
+    assert user_names(Comparison("user_name", "eq", "user")) == ["user"]
+    assert user_names(Comparison("user_name", "ne", "user")) == ["admin", "moderator"]
+    assert user_names(Comparison("user_name", "sw", "MOD")) == ["moderator"]
+    assert user_names(Comparison("user_name", "ew", "in")) == ["admin"]
+    assert user_names(Comparison("user_name", "co", "e")) == ["moderator", "user"]
+    assert user_names(Comparison("user_name", "gt", "moderator")) == ["user"]
+    assert user_names(Comparison("user_name", "le", "moderator")) == [
+        "admin",
+        "moderator",
+    ]
+    assert user_names(Comparison("title", "pr")) == ["user"]
+    assert user_names(Not(Comparison("title", "pr"))) == ["admin", "moderator"]
+    assert user_names(Not(Comparison("title", "eq", "Dr."))) == ["admin", "moderator"]
+    assert user_names(Comparison("emails", "eq", "jack@doe.test")) == ["moderator"]
+    assert user_names(Comparison("emails", "sw", "ja")) == ["admin", "moderator"]
+    assert user_names(Comparison("emails", "ew", "@doe.test")) == [
+        "admin",
+        "moderator",
+        "user",
+    ]
+    assert user_names(
+        And(
+            [Comparison("family_name", "eq", "Doe"), Comparison("user_name", "sw", "a")]
+        )
+    ) == ["admin"]
+    assert user_names(
+        Or([Comparison("user_name", "eq", "user"), Comparison("emails", "co", "jane")])
+    ) == ["admin", "user"]
+    assert user_names(Comparison("user_name", "co", "%")) == []
+
+    assert backend.query(
+        models.User,
+        where=Comparison("family_name", "eq", "Doe"),
+        order_by="user_name",
+        limit=1,
+    ) == [admin]
+
+
+def test_query_where_invalid(testclient, backend):
+    """Test that filters on unknown or unordered attributes are refused."""
+    with pytest.raises(ValueError):
+        backend.query(models.User, where=Comparison("invalid", "eq", "foo"))
+
+    with pytest.raises(ValueError):
+        backend.query(models.User, where=Comparison("emails", "gt", "foo"))
+
+    with pytest.raises(ValueError):
+        backend.count(models.User, where=Comparison("groups", "co", "foo"))
+
+    with pytest.raises(ValueError):
+        Comparison("user_name", "invalid", "foo")
+
+
+def test_query_pagination(testclient, user, moderator, admin, backend):
+    """Test that queries can be sorted and paginated by the backend."""
+    assert backend.query(models.User, order_by="user_name") == [admin, moderator, user]
+    assert backend.query(models.User, order_by="user_name", descending=True) == [
+        user,
+        moderator,
+        admin,
+    ]
+    assert backend.query(models.User, order_by="user_name", limit=2) == [
+        admin,
+        moderator,
+    ]
+    assert backend.query(models.User, order_by="user_name", offset=1, limit=1) == [
+        moderator
+    ]
+    assert backend.query(models.User, order_by="user_name", offset=2, limit=5) == [user]
+    assert not backend.query(models.User, order_by="user_name", offset=3)
+    assert not backend.query(models.User, limit=0)
+    assert backend.query(
+        models.User, order_by="user_name", limit=1, emails="jack@doe.test"
+    ) == [moderator]
+
+
+def test_query_pagination_without_order(testclient, user, moderator, admin, backend):
+    """Test that paginating without sorting attribute returns stable pages."""
+    pages = [
+        list(backend.query(models.User, offset=offset, limit=2))
+        for offset in range(0, 4, 2)
+    ]
+    assert [len(page) for page in pages] == [2, 1]
+    assert sorted(pages[0] + pages[1], key=lambda user: user.id) == sorted(
+        [user, moderator, admin], key=lambda user: user.id
+    )
+    assert list(backend.query(models.User, offset=0, limit=2)) == pages[0]
+    assert list(backend.query(models.User, offset=2, limit=2)) == pages[1]
+
+
+def test_iter_query(testclient, user, moderator, admin, backend):
+    """Test that iter_query lazily yields every matching instance by batches."""
+    instances = backend.iter_query(models.User, batch_size=2)
+    assert not isinstance(instances, list)
+    assert sorted(instances, key=lambda user: user.id) == sorted(
+        [user, moderator, admin], key=lambda user: user.id
+    )
+    assert list(
+        backend.iter_query(models.User, batch_size=1, emails="jack@doe.test")
+    ) == [moderator]
+    assert list(backend.iter_query(models.User, user_name="invalid")) == []
+
+
+def test_save_many_delete_many(testclient, backend):
+    """Test that several instances are saved and deleted at once, with signals."""
+    from blinker import signal
+
+    saved = []
+    deleted = []
+
+    def on_save(sender, data):
+        saved.append(sender)
+
+    def on_delete(sender, data):
+        deleted.append(sender)
+
+    signal("after_group_save").connect(on_save)
+    signal("after_group_delete").connect(on_delete)
+
+    groups = [models.Group(display_name=f"group{i}") for i in range(3)]
+    try:
+        backend.save_many(groups)
+        assert saved == groups
+        assert sorted(group.id for group in backend.query(models.Group)) == sorted(
+            group.id for group in groups
+        )
+        assert all(group.created for group in groups)
+
+        backend.delete_many(groups)
+        assert deleted == groups
+        assert backend.query(models.Group) == []
+    finally:
+        signal("after_group_save").disconnect(on_save)
+        signal("after_group_delete").disconnect(on_delete)
+
+
+def test_query_order_by_invalid_attribute(testclient, user, backend):
+    """Test that only single-valued and non-reference attributes can be sorted on."""
+    with pytest.raises(ValueError):
+        backend.query(models.User, order_by="invalid")
+
+    with pytest.raises(ValueError):
+        backend.query(models.User, order_by="emails")
+
+    with pytest.raises(ValueError):
+        backend.query(models.User, order_by="groups")
+
+
+def test_get_identity_map(testclient, user, backend):
+    """Test that repeated lookups during a request return the same instance."""
+    with testclient.app.test_request_context():
+        if backend.identity_map() is None:
+            pytest.skip("The backend relies on its own identity map")
+
+        with mock.patch.object(backend, "do_get", wraps=backend.do_get) as do_get:
+
+            def lookups():
+                return do_get.call_args_list.count(
+                    mock.call(models.User, None, fields=None, user_name="user")
+                )
+
+            instance = backend.get(models.User, user_name="user")
+            assert backend.get(models.User, user_name="user") is instance
+            assert lookups() == 1
+
+            instance.display_name = "Johnny"
+            backend.save(instance)
+            assert backend.get(models.User, user_name="user") is not instance
+            assert lookups() == 2
+
+            backend.teardown()
+            backend.get(models.User, user_name="user")
+            assert lookups() == 3
+
+
+def test_query_fields(testclient, user, admin, backend):
+    """Test that partially loaded instances lazily load the other attributes."""
+    users = backend.query(models.User, fields=["user_name"], order_by="user_name")
+    assert [u.user_name for u in users] == ["admin", "user"]
+    assert [u.family_name for u in users] == [admin.family_name, user.family_name]
+
+    instance = backend.get(models.User, user_name="user", fields=["user_name"])
+    assert instance == user
+    assert instance.emails == user.emails
+
+    instance.display_name = "Johnny"
+    backend.save(instance)
+    backend.reload(user)
+    assert user.display_name == "Johnny"
+    assert user.emails == instance.emails
+
+
+def test_query_unknown_fields(testclient, user, backend):
+    """Test that requesting unknown fields raises an error."""
+    with pytest.raises(ValueError):
+        backend.query(models.User, fields=["invalid"])
+
+    with pytest.raises(ValueError):
+        backend.get(models.User, user_name="user", fields=["invalid"])
+
+
 def test_get_persisted_value(testclient, user, backend):
     """Test that get_persisted_value returns the stored value ignoring in-memory changes."""
     assert backend.get_persisted_value(user, "family_name") == user.family_name
@@ -143,7 +143,9 @@ def test_registration_with_email_already_taken(
     testclient.app.config["CANAILLE"]["HIDE_INVALID_LOGINS"] = False
     res = testclient.get(url_for("core.account.join"))
     res.form["email"] = "john@doe.test"
-    res = res.form.submit()
+    with mock.patch.object(backend, "query", wraps=backend.query) as query:
+        res = res.form.submit()
+        assert not any(call.args[0] is models.User for call in query.call_args_list)
     assert res.flashes == []
     res.mustcontain("The email 'john@doe.test' is already used")
 
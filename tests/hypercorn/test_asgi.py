@@ -0,0 +1,109 @@
+"""Tests for the native ASGI serving of the protocol endpoints."""
+
+import asyncio
+import os
+from unittest import mock
+
+import httpx
+import pytest
+from asgiref.wsgi import WsgiToAsgi
+
+from canaille.hypercorn.app import create_app
+from canaille.hypercorn.asgi import ASGIApplication
+from canaille.hypercorn.asgi import build_environ
+
+
+@pytest.fixture
+def flask_app(configuration, backend):
+    os.environ["AUTHLIB_INSECURE_TRANSPORT"] = "true"
+    yield create_app(config=configuration, backend=backend, wrap_asgi=False)
+    del os.environ["AUTHLIB_INSECURE_TRANSPORT"]
+
+
+def request(asgi_app, method, url, **kwargs):
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://canaille.test"
+        ) as client:
+            return await client.request(method, url, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_create_app_native_asgi(configuration, backend):
+    """The protocol endpoints are served natively unless disabled."""
+    assert isinstance(
+        create_app(config=configuration, backend=backend), ASGIApplication
+    )
+
+    configuration["CANAILLE_HYPERCORN"]["NATIVE_ASGI"] = False
+    assert isinstance(create_app(config=configuration, backend=backend), WsgiToAsgi)
+
+
+def test_native_responses_match_the_bridge(flask_app):
+    """Native and bridged responses to the protocol endpoints are identical."""
+    native = ASGIApplication(flask_app)
+    bridge = WsgiToAsgi(flask_app)
+
+    for method, url, kwargs in [
+        ("GET", "/.well-known/openid-configuration", {}),
+        ("GET", "/oauth/jwks.json", {}),
+        ("POST", "/oauth/token", {"data": {"grant_type": "client_credentials"}}),
+        ("GET", "/scim/v2/Users?count=1", {}),
+    ]:
+        with mock.patch.object(native, "bridge", side_effect=AssertionError):
+            native_response = request(native, method, url, **kwargs)
+        bridge_response = request(bridge, method, url, **kwargs)
+
+        assert native_response.status_code == bridge_response.status_code
+        assert native_response.content == bridge_response.content
+        assert (
+            native_response.headers["content-type"]
+            == bridge_response.headers["content-type"]
+        )
+
+
+def test_html_interface_uses_the_bridge(flask_app):
+    """The other endpoints are served through the WSGI bridge."""
+    native = ASGIApplication(flask_app)
+
+    with mock.patch.object(native, "dispatch", side_effect=AssertionError):
+        response = request(native, "GET", "/login")
+
+    assert response.status_code == 200
+
+
+def test_build_environ():
+    """The WSGI environment strips the root path and merges repeated headers."""
+    environ = build_environ(
+        {
+            "type": "http",
+            "method": "POST",
+            "http_version": "1.1",
+            "scheme": "https",
+            "root_path": "/auth",
+            "path": "/auth/oauth/token",
+            "query_string": b"foo=bar",
+            "server": ("canaille.test", 443),
+            "client": ("127.0.0.1", 1234),
+            "headers": [
+                (b"content-type", b"application/x-www-form-urlencoded"),
+                (b"content-length", b"7"),
+                (b"accept", b"text/html"),
+                (b"accept", b"application/json"),
+            ],
+        },
+        b"foo=bar",
+    )
+
+    assert environ["SCRIPT_NAME"] == "/auth"
+    assert environ["PATH_INFO"] == "/oauth/token"
+    assert environ["QUERY_STRING"] == "foo=bar"
+    assert environ["SERVER_PORT"] == "443"
+    assert environ["REMOTE_ADDR"] == "127.0.0.1"
+    assert environ["CONTENT_TYPE"] == "application/x-www-form-urlencoded"
+    assert environ["CONTENT_LENGTH"] == "7"
+    assert environ["HTTP_ACCEPT"] == "text/html,application/json"
+    assert environ["wsgi.url_scheme"] == "https"
+    assert environ["wsgi.input"].read() == b"foo=bar"
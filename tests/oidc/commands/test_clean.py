@@ -77,6 +77,37 @@ def test_clean_command(cli_runner, backend, client, user):
 
     res = cli_runner.invoke(cli, ["clean"])
     assert res.exit_code == 0, res.stdout
+    assert "Removed 1 expired tokens" in res.stdout
+    assert "Removed 1 expired authorization codes" in res.stdout
 
     assert backend.get(models.AuthorizationCode) == valid_code
     assert backend.get(models.Token, subject=user) == valid_token
+
+
+def test_clean_command_dry_run(cli_runner, backend, client, user):
+    """Test that the clean command only counts expired objects with --dry-run."""
+    expired_token = models.Token(
+        token_id=gen_salt(48),
+        access_token="my-expired-token",
+        client=client,
+        subject=user,
+        refresh_token=gen_salt(48),
+        scope=["openid", "profile"],
+        issue_date=(
+            datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+            - datetime.timedelta(days=1)
+        ),
+        lifetime=3600,
+    )
+    backend.save(expired_token)
+
+    res = cli_runner.invoke(cli, ["clean", "--dry-run", "--batch-size", "10"])
+    assert res.exit_code == 0, res.stdout
+    assert "Would remove 1 expired tokens" in res.stdout
+    assert "Would remove 0 expired authorization codes" in res.stdout
+    assert backend.get(models.Token, access_token="my-expired-token")
+
+    res = cli_runner.invoke(cli, ["clean", "--batch-size", "10"])
+    assert res.exit_code == 0, res.stdout
+    assert "Removed 1 expired tokens" in res.stdout
+    assert not backend.get(models.Token, access_token="my-expired-token")
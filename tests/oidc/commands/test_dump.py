@@ -125,6 +125,7 @@ def test_dump_stdout(cli_runner, backend, user, client, trusted_client, consent,
     assert payload["token"] == [
         {
             "access_token": mock.ANY,
+            "access_token_digest": mock.ANY,
             "audience": [
                 client.id,
             ],
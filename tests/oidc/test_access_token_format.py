@@ -0,0 +1,122 @@
+import datetime
+import time
+from unittest import mock
+
+import time_machine
+from joserfc import jwt
+
+from canaille.app import models
+from canaille.backends import Backend
+
+from . import client_credentials
+
+
+def request_token(testclient, client):
+    return testclient.post(
+        "/oauth/token",
+        params=dict(
+            grant_type="password",
+            username="user",
+            password="correct horse battery staple",
+            scope="openid profile",
+        ),
+        headers={"Authorization": f"Basic {client_credentials(client)}"},
+        status=200,
+    ).json
+
+
+def test_reference_access_tokens(testclient, user, client, backend):
+    """Test that reference access tokens are random strings validated by lookup."""
+    testclient.app.config["CANAILLE_OIDC"]["ACCESS_TOKEN_FORMAT"] = "reference"
+
+    access_token = request_token(testclient, client)["access_token"]
+    assert "." not in access_token
+    assert len(access_token) == 48
+
+    headers = {"Authorization": f"Bearer {access_token}"}
+    res = testclient.get("/oauth/userinfo", headers=headers, status=200)
+    assert res.json["sub"] == "user"
+
+    token = backend.get(models.Token, access_token=access_token)
+    assert token.subject == user
+
+
+def test_stateless_validation_does_not_read_the_token(
+    testclient, user, client, backend
+):
+    """Test that stateless validation does not search the token in the backend."""
+    testclient.app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"] = True
+    access_token = request_token(testclient, client)["access_token"]
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    testclient.get("/oauth/userinfo", headers=headers, status=200)
+    with mock.patch.object(Backend.instance, "get", wraps=Backend.instance.get) as get:
+        res = testclient.get("/oauth/userinfo", headers=headers, status=200)
+        assert not any(call.args[0] is models.Token for call in get.call_args_list)
+
+    assert res.json["sub"] == "user"
+
+
+def test_stateless_validation_revoked_token(testclient, user, client, backend):
+    """Test that revoked tokens are refused by the stateless validation."""
+    testclient.app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"] = True
+    access_token = request_token(testclient, client)["access_token"]
+    headers = {"Authorization": f"Bearer {access_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=200)
+
+    token = backend.get(models.Token, access_token=access_token)
+    token.revokation_date = datetime.datetime.now(datetime.timezone.utc)
+    backend.save(token)
+
+    testclient.get("/oauth/userinfo", headers=headers, status=401)
+
+
+def test_stateless_validation_rebuilds_revocation_filter(
+    testclient, user, client, backend
+):
+    """Test that the revocation filter is rebuilt from the backend."""
+    access_token = request_token(testclient, client)["access_token"]
+    token = backend.get(models.Token, access_token=access_token)
+    token.revokation_date = datetime.datetime.now(datetime.timezone.utc)
+    backend.save(token)
+
+    testclient.app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"] = True
+    headers = {"Authorization": f"Bearer {access_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=401)
+
+
+def test_stateless_validation_expired_token(testclient, user, client, backend):
+    """Test that expired tokens are refused by the stateless validation."""
+    testclient.app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"] = True
+    access_token = request_token(testclient, client)["access_token"]
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    with time_machine.travel(datetime.timedelta(days=30)):
+        testclient.get("/oauth/userinfo", headers=headers, status=401)
+
+
+def test_stateless_validation_refuses_other_jwts(
+    testclient, user, client, backend, server_jwk
+):
+    """Test that server JWTs without the at+jwt type cannot be used as access tokens."""
+    testclient.app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"] = True
+    now = int(time.time())
+    claims = {
+        "iss": "http://canaille.test",
+        "sub": "user",
+        "aud": client.client_id,
+        "client_id": client.client_id,
+        "scope": "openid profile",
+        "iat": now,
+        "exp": now + 3600,
+    }
+
+    id_token = jwt.encode({"alg": "RS256", "kid": server_jwk.kid}, claims, server_jwk)
+    headers = {"Authorization": f"Bearer {id_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=401)
+
+    access_token = jwt.encode(
+        {"typ": "at+jwt", "alg": "RS256", "kid": server_jwk.kid}, claims, server_jwk
+    )
+    headers = {"Authorization": f"Bearer {access_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=200)
@@ -1,5 +1,6 @@
 import datetime
 import logging
+from unittest import mock
 from urllib.parse import parse_qs
 from urllib.parse import urlsplit
 
@@ -10,6 +11,7 @@ from joserfc import jwt
 from werkzeug.security import gen_salt
 
 from canaille.app import models
+from canaille.backends import Backend
 from canaille.core.models import PASSWORD_MIN_DELAY
 from canaille.oidc.jose import registry
 
@@ -553,7 +555,7 @@ def test_consent_already_given(testclient, logged_user, client, backend):
             response_type="code",
             client_id=client.client_id,
             scope="openid profile",
-            nonce="somenonce",
+            nonce="othernonce",
             redirect_uri="https://client.test/redirect1",
         ),
         status=302,
@@ -674,7 +676,7 @@ def test_when_consent_already_given_but_for_a_smaller_scope(
             response_type="code",
             client_id=client.client_id,
             scope="openid profile groups",
-            nonce="somenonce",
+            nonce="othernonce",
             redirect_uri="https://client.test/redirect1",
         ),
         status=200,
@@ -739,6 +741,31 @@ def test_nonce_required_in_oidc_requests(testclient, logged_user, client):
     assert params["error"] == ["invalid_request"]
 
 
+def test_nonce_replay(testclient, logged_user, client, backend):
+    """Test that a nonce cannot be used twice by a client."""
+    params = dict(
+        response_type="code",
+        client_id=client.client_id,
+        scope="openid profile",
+        nonce="replayednonce",
+        redirect_uri="https://client.test/redirect1",
+    )
+    res = testclient.get("/oauth/authorize", params=params, status=200)
+    res = res.form.submit(name="answer", value="accept", status=302)
+    assert "code" in parse_qs(urlsplit(res.location).query)
+
+    with mock.patch.object(
+        Backend.instance, "query", wraps=Backend.instance.query
+    ) as query:
+        res = testclient.get("/oauth/authorize", params=params, status=302)
+        assert not any(
+            call.args[0] is models.AuthorizationCode for call in query.call_args_list
+        )
+
+    params = parse_qs(urlsplit(res.location).query)
+    assert params["error"] == ["invalid_request"]
+
+
 def test_nonce_not_required_in_oauth_requests(testclient, logged_user, client, backend):
     """Test that nonce is not required for pure OAuth requests without openid scope."""
     assert not backend.query(models.Consent, client=client, subject=logged_user)
@@ -1,6 +1,10 @@
+from unittest import mock
+
 from werkzeug.security import gen_salt
 
 from canaille.app import models
+from canaille.app.flask import cache
+from canaille.oidc.cors import ORIGINS_GENERATION_KEY
 from canaille.oidc.cors import get_allowed_origins
 from canaille.oidc.cors import get_client_origin
 
@@ -237,3 +241,51 @@ def test_get_allowed_origins_no_valid_origins(testclient, backend):
         assert "invalid" not in origins
     finally:
         backend.delete(c)
+
+
+def test_allowed_origins_are_not_queried_on_each_request(testclient, client, backend):
+    """The allowed origins are only queried once, until a client changes."""
+    headers = {"Origin": "https://client.test"}
+    with mock.patch.object(backend, "query", wraps=backend.query) as query:
+        testclient.get("/.well-known/openid-configuration", headers=headers)
+        testclient.get("/.well-known/openid-configuration", headers=headers)
+        client_queries = [
+            call for call in query.call_args_list if call.args[0] is models.Client
+        ]
+        assert len(client_queries) == 1
+
+
+def test_allowed_origins_follow_client_changes(testclient, client, backend):
+    """Saving or deleting a client updates the allowed origins."""
+    assert "https://other.test" not in get_allowed_origins()
+
+    other = models.Client(
+        client_id=gen_salt(24),
+        client_name="Other client",
+        client_uri="https://other.test",
+        client_secret=gen_salt(48),
+    )
+    backend.save(other)
+    assert "https://other.test" in get_allowed_origins()
+
+    other.client_uri = "https://another.test"
+    backend.save(other)
+    assert "https://other.test" not in get_allowed_origins()
+    assert "https://another.test" in get_allowed_origins()
+
+    backend.delete(other)
+    assert "https://another.test" not in get_allowed_origins()
+
+
+def test_allowed_origins_generation(testclient, client, backend):
+    """Another worker sharing the cache notices the generation change."""
+    get_allowed_origins()
+    generation = cache.get(ORIGINS_GENERATION_KEY) or 0
+
+    # simulate a change made by another worker
+    cache.set(ORIGINS_GENERATION_KEY, generation + 1, timeout=0)
+    with mock.patch(
+        "canaille.oidc.cors.build_allowed_origins",
+        return_value=frozenset({"https://elsewhere.test"}),
+    ):
+        assert get_allowed_origins() == {"https://elsewhere.test"}
@@ -205,7 +205,7 @@ def test_auth_time_update(
                 response_type="code",
                 client_id=client.client_id,
                 scope="openid profile email groups address phone",
-                nonce="somenonce",
+                nonce="othernonce",
                 tos_uri="https://client.test/tos",
                 policy_uri="https://client.test/policy",
                 redirect_uri="https://client.test/redirect1",
@@ -196,3 +196,93 @@ def test_get_jwt_config_fallback_to_first_key(testclient):
     assert config["key"].key_type == "OKP"
     assert config["alg"] == "EdDSA"
     assert config["kid"] == okp_key.kid
+
+
+def test_signer_tokens_are_valid_jwts(testclient, server_jwk):
+    """Test that the tokens signed by the prepared signers are regular JWTs."""
+    from canaille.oidc.jose import get_signer
+
+    signer = get_signer()
+    token = signer.sign({"sub": "user", "iat": 1})
+
+    decoded = jwt.decode(token, server_jwk, algorithms=[signer.alg])
+    assert decoded.header == {"typ": "at+jwt", "alg": signer.alg, "kid": server_jwk.kid}
+    assert decoded.claims == {"sub": "user", "iat": 1}
+
+
+def test_access_token_signing_algorithm_preference(
+    testclient, user, client, server_jwk, okp_jwk
+):
+    """Test that access tokens are signed with the preferred algorithms."""
+    testclient.app.config["CANAILLE_OIDC"]["ACTIVE_JWKS"] = [
+        server_jwk.as_dict(private=True),
+        okp_jwk.as_dict(private=True),
+    ]
+    testclient.app.config["CANAILLE_OIDC"]["ACCESS_TOKEN_SIGNING_ALGORITHMS"] = [
+        "ES256",
+        "EdDSA",
+    ]
+
+    res = testclient.post(
+        "/oauth/token",
+        params=dict(
+            grant_type="password",
+            username="user",
+            password="correct horse battery staple",
+            scope="openid profile",
+        ),
+        headers={"Authorization": f"Basic {client_credentials(client)}"},
+        status=200,
+    )
+
+    access_token = jwt.decode(res.json["access_token"], okp_jwk, algorithms=["EdDSA"])
+    assert access_token.header["alg"] == "EdDSA"
+    assert access_token.header["kid"] == okp_jwk.kid
+    assert access_token.claims["sub"] == "user"
+
+
+def test_client_algorithm_overrides_signing_preference(
+    testclient, user, client, backend, server_jwk, okp_jwk
+):
+    """Test that the client algorithm takes precedence over the server preference."""
+    testclient.app.config["CANAILLE_OIDC"]["ACTIVE_JWKS"] = [
+        server_jwk.as_dict(private=True),
+        okp_jwk.as_dict(private=True),
+    ]
+    testclient.app.config["CANAILLE_OIDC"]["ACCESS_TOKEN_SIGNING_ALGORITHMS"] = [
+        "EdDSA"
+    ]
+    backend.update(client, id_token_signed_response_alg="RS256")
+    backend.save(client)
+
+    res = testclient.post(
+        "/oauth/token",
+        params=dict(
+            grant_type="password",
+            username="user",
+            password="correct horse battery staple",
+            scope="openid profile",
+        ),
+        headers={"Authorization": f"Basic {client_credentials(client)}"},
+        status=200,
+    )
+
+    access_token = jwt.decode(res.json["access_token"], server_jwk)
+    assert access_token.header["alg"] == "RS256"
+    assert access_token.header["kid"] == server_jwk.kid
+
+
+def test_server_signers_follow_active_jwks(testclient, okp_jwk):
+    """Test that the signers are prepared once, and rebuilt when the keys change."""
+    from canaille.oidc.jose import server_signers
+
+    signers = server_signers()
+    assert server_signers() is signers
+    assert "EdDSA" not in signers
+
+    testclient.app.config["CANAILLE_OIDC"]["ACTIVE_JWKS"] = [
+        okp_jwk.as_dict(private=True)
+    ]
+    signers = server_signers()
+    assert [signer.kid for signer in signers["EdDSA"]] == [okp_jwk.kid]
+    assert signers[None][0].alg == "EdDSA"
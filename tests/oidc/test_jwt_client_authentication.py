@@ -3,11 +3,15 @@ import logging
 import time
 import uuid
 
+import pytest
 from joserfc import jwt
 from werkzeug.security import gen_salt
 
 from canaille import create_app
 from canaille.app import models
+from canaille.oidc.jose import CLIENT_JWKS_DEFAULT_LIFETIME
+from canaille.oidc.jose import client_jwks_lifetime
+from canaille.oidc.jose import get_client_jwks
 
 
 def test_no_server_name_config(configuration, caplog):
@@ -235,3 +239,37 @@ def test_same_jti_twice(
         "error_description": "JWT ID is used before.",
     }
     backend.delete(new_code)
+
+
+@pytest.mark.parametrize(
+    "cache_control,requests",
+    [
+        (None, 1),
+        ("max-age=600", 1),
+        ("max-age=0", 2),
+        ("no-store", 2),
+    ],
+)
+def test_client_jwks_uri_cache_control(
+    testclient, client_jwk, client, backend, httpserver, cache_control, requests
+):
+    """Test that the downloaded client JWKS are cached according to their Cache-Control header."""
+    headers = {"Cache-Control": cache_control} if cache_control else {}
+    httpserver.expect_request("/jwks.json").respond_with_json(
+        {"keys": [client_jwk.as_dict(private=False)]}, headers=headers
+    )
+    client.jwks_uri = f"http://{httpserver.host}:{httpserver.port}/jwks.json"
+    client.jwks = None
+    backend.save(client)
+
+    assert get_client_jwks(client).kid == client_jwk.kid
+    assert get_client_jwks(client).kid == client_jwk.kid
+    assert len(httpserver.log) == requests
+
+
+def test_client_jwks_lifetime():
+    """Test the client JWKS cache lifetime computation."""
+    assert client_jwks_lifetime({}) == CLIENT_JWKS_DEFAULT_LIFETIME
+    assert client_jwks_lifetime({"cache-control": "public, max-age=120"}) == 120
+    assert client_jwks_lifetime({"cache-control": "max-age=999999"}) == 3600
+    assert client_jwks_lifetime({"cache-control": "no-cache"}) is None
@@ -0,0 +1,69 @@
+import hashlib
+import secrets
+from unittest import mock
+
+from canaille.app import models
+from canaille.backends import Backend
+from canaille.oidc.tokens import RevocationFilter
+from canaille.oidc.tokens import get_revocation_filter
+
+from . import client_credentials
+
+
+def digest():
+    return hashlib.sha256(secrets.token_bytes(16)).hexdigest()
+
+
+def test_revocation_filter_has_no_false_negatives():
+    """Test that every revoked digest is found in the filter."""
+    revoked = [digest() for _ in range(2000)]
+    revocation_filter = RevocationFilter(len(revoked))
+    for item in revoked:
+        revocation_filter.add(item)
+
+    assert all(item in revocation_filter for item in revoked)
+
+
+def test_revocation_filter_false_positive_rate():
+    """Test that the false positive rate matches the expected error rate."""
+    revocation_filter = RevocationFilter(2000, error_rate=0.01)
+    for _ in range(2000):
+        revocation_filter.add(digest())
+
+    false_positives = sum(digest() in revocation_filter for _ in range(10000))
+    assert false_positives < 300
+
+
+def test_revocation_filter_size():
+    """Test that the filter size follows its capacity."""
+    small = RevocationFilter(0)
+    large = RevocationFilter(100000)
+
+    assert len(small.bits) < 2000
+    assert len(large.bits) > len(small.bits) * 50
+    assert small.hash_count == large.hash_count == 10
+
+
+def test_stateless_validation_confirms_filter_hits(testclient, user, client, backend):
+    """Test that tokens found in the filter are confirmed with the backend."""
+    testclient.app.config["CANAILLE_OIDC"]["STATELESS_TOKEN_VALIDATION"] = True
+    res = testclient.post(
+        "/oauth/token",
+        params=dict(
+            grant_type="password",
+            username="user",
+            password="correct horse battery staple",
+            scope="openid profile",
+        ),
+        headers={"Authorization": f"Basic {client_credentials(client)}"},
+        status=200,
+    )
+    access_token = res.json["access_token"]
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    with testclient.app.test_request_context():
+        get_revocation_filter().add(hashlib.sha256(access_token.encode()).hexdigest())
+
+    with mock.patch.object(Backend.instance, "get", wraps=Backend.instance.get) as get:
+        testclient.get("/oauth/userinfo", headers=headers, status=200)
+        assert any(call.args[0] is models.Token for call in get.call_args_list)
@@ -0,0 +1,71 @@
+"""Benchmarks of the token and resource endpoints.
+
+Run with ``pytest tests/oidc/test_token_benchmark.py --benchmark-only``.
+"""
+
+import pytest
+from joserfc import jwk
+
+from . import client_credentials
+
+pytest.importorskip("pytest_benchmark")
+
+KEYS = {
+    "RS256": ("RSA", 2048),
+    "ES256": ("EC", "P-256"),
+    "EdDSA": ("OKP", "Ed25519"),
+}
+
+
+@pytest.mark.parametrize("alg", KEYS)
+def test_token_endpoint_benchmark(benchmark, testclient, user, client, alg):
+    key = jwk.generate_key(*KEYS[alg])
+    key.ensure_kid()
+    testclient.app.config["CANAILLE_OIDC"]["ACTIVE_JWKS"] = [key.as_dict(private=True)]
+    testclient.app.config["CANAILLE_OIDC"]["ACCESS_TOKEN_SIGNING_ALGORITHMS"] = [alg]
+
+    def request_token():
+        return testclient.post(
+            "/oauth/token",
+            params=dict(
+                grant_type="password",
+                username="user",
+                password="correct horse battery staple",
+                scope="openid profile",
+            ),
+            headers={"Authorization": f"Basic {client_credentials(client)}"},
+            status=200,
+        )
+
+    res = benchmark.pedantic(request_token, rounds=10, warmup_rounds=1)
+    assert res.json["access_token"]
+
+
+MODES = {
+    "reference": {"ACCESS_TOKEN_FORMAT": "reference"},
+    "jwt": {"ACCESS_TOKEN_FORMAT": "jwt"},
+    "stateless": {"ACCESS_TOKEN_FORMAT": "jwt", "STATELESS_TOKEN_VALIDATION": True},
+}
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_userinfo_benchmark(benchmark, testclient, user, client, mode):
+    testclient.app.config["CANAILLE_OIDC"].update(MODES[mode])
+    res = testclient.post(
+        "/oauth/token",
+        params=dict(
+            grant_type="password",
+            username="user",
+            password="correct horse battery staple",
+            scope="openid profile",
+        ),
+        headers={"Authorization": f"Basic {client_credentials(client)}"},
+        status=200,
+    )
+    headers = {"Authorization": f"Bearer {res.json['access_token']}"}
+
+    def request_userinfo():
+        return testclient.get("/oauth/userinfo", headers=headers, status=200)
+
+    res = benchmark.pedantic(request_userinfo, rounds=50, warmup_rounds=1)
+    assert res.json["sub"] == "user"
@@ -0,0 +1,95 @@
+import datetime
+import hashlib
+from unittest import mock
+
+import time_machine
+from werkzeug.security import gen_salt
+
+from canaille.app import models
+from canaille.backends import Backend
+
+
+def test_userinfo_uses_cached_token(testclient, token, user, backend):
+    """Test that repeated calls with the same access token only search it once."""
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    with mock.patch.object(Backend.instance, "get", wraps=Backend.instance.get) as get:
+        testclient.get("/oauth/userinfo", headers=headers, status=200)
+        lookups = [
+            call for call in get.call_args_list if "access_token_digest" in call.kwargs
+        ]
+        assert len(lookups) == 1
+
+        res = testclient.get("/oauth/userinfo", headers=headers, status=200)
+        lookups = [
+            call for call in get.call_args_list if "access_token_digest" in call.kwargs
+        ]
+        assert len(lookups) == 1
+
+    assert res.json["sub"] == "user"
+
+
+def test_revoked_token_is_not_served_from_cache(testclient, token, backend):
+    """Test that saving a token invalidates its cache entry."""
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=200)
+
+    token.revokation_date = datetime.datetime.now(datetime.timezone.utc)
+    backend.save(token)
+
+    testclient.get("/oauth/userinfo", headers=headers, status=401)
+
+
+def test_deleted_token_is_not_served_from_cache(testclient, client, user, backend):
+    """Test that deleting a token invalidates its cache entry."""
+    token = models.Token(
+        token_id=gen_salt(48),
+        access_token=gen_salt(48),
+        audience=[client],
+        client=client,
+        subject=user,
+        scope=["openid", "profile"],
+        issue_date=datetime.datetime.now(datetime.timezone.utc),
+        lifetime=3600,
+    )
+    backend.save(token)
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=200)
+
+    backend.delete(token)
+
+    testclient.get("/oauth/userinfo", headers=headers, status=401)
+
+
+def test_token_cache_does_not_outlive_token(testclient, token, backend):
+    """Test that tokens are not cached beyond their expiration."""
+    token.issue_date = datetime.datetime.now(datetime.timezone.utc)
+    token.lifetime = 10
+    backend.save(token)
+
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    testclient.get("/oauth/userinfo", headers=headers, status=200)
+
+    with time_machine.travel(datetime.timedelta(seconds=30)):
+        with mock.patch.object(
+            Backend.instance, "get", wraps=Backend.instance.get
+        ) as get:
+            testclient.get("/oauth/userinfo", headers=headers, status=401)
+            assert any(
+                "access_token_digest" in call.kwargs for call in get.call_args_list
+            )
+
+
+def test_tokens_are_looked_up_by_digest(testclient, token, backend):
+    """Test that tokens store the digest of their access token, and are found by it."""
+    digest = hashlib.sha256(token.access_token.encode()).hexdigest()
+    assert token.access_token_digest == digest
+
+    token.access_token = gen_salt(48)
+    backend.save(token)
+    assert token.access_token_digest != digest
+    assert backend.get(models.Token, access_token_digest=digest) is None
+
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    with mock.patch.object(Backend.instance, "get", wraps=Backend.instance.get) as get:
+        testclient.get("/oauth/userinfo", headers=headers, status=200)
+        assert not any("access_token" in call.kwargs for call in get.call_args_list)
@@ -5,6 +5,7 @@ from joserfc import jwt
 from canaille.oidc.configuration import UserInfoMappingSettings
 from canaille.oidc.jose import registry
 from canaille.oidc.userinfo import generate_user_claims
+from canaille.oidc.userinfo import get_claim_templates
 
 
 def test_generate_user_claims(user, foo_group):
@@ -262,3 +263,42 @@ def test_picture_claim(testclient, backend, user, jpeg_photo):
 
     assert "picture" in data
     testclient.get(data["picture"], status=200)
+
+
+def test_claim_templates_are_compiled_once(testclient, backend, user):
+    """Test that the claim templates are only compiled once per mapping."""
+    with mock.patch.object(
+        testclient.app.jinja_env,
+        "from_string",
+        wraps=testclient.app.jinja_env.from_string,
+    ) as from_string:
+        generate_user_claims(user)
+        compilations = from_string.call_count
+        assert compilations > 0
+
+        generate_user_claims(user)
+        assert from_string.call_count == compilations
+
+        generate_user_claims(user, {"EMAIL": "{{ user.user_name }}@mydomain.test"})
+        assert from_string.call_count > compilations
+
+
+def test_generate_user_claims_scope(testclient, backend, user, foo_group):
+    """Test that only the attributes of the claims in the scope are read."""
+    templates = get_claim_templates()
+    assert templates.scope_attributes("openid email") == {
+        "user_name",
+        "preferred_email",
+    }
+
+    with mock.patch.object(
+        type(user), "groups", new_callable=mock.PropertyMock
+    ) as groups:
+        data = generate_user_claims(user, scope="openid email")
+        groups.assert_not_called()
+
+    assert data == {"sub": "user", "email": "john@doe.test"}
+    assert generate_user_claims(user, scope="openid groups") == {
+        "sub": "user",
+        "groups": ["foo"],
+    }
@@ -1,5 +1,9 @@
+from unittest import mock
+
 from flask import g
 
+from canaille.oidc.metadata import openid_configuration
+
 
 def test_oauth_authorization_server(testclient):
     res = testclient.get("/.well-known/oauth-authorization-server", status=200).json
@@ -322,3 +326,62 @@ def test_request_object_alg_includes_none(testclient):
 
     assert "none" in res["request_object_signing_alg_values_supported"]
     assert res["request_object_signing_alg_values_supported"][0] == "none"
+
+
+def test_openid_configuration_is_built_once(testclient):
+    """Test that the discovery document is only built once."""
+    with mock.patch(
+        "canaille.oidc.endpoints.well_known.openid_configuration",
+        wraps=openid_configuration,
+    ) as build:
+        first = testclient.get("/.well-known/openid-configuration", status=200)
+        second = testclient.get("/.well-known/openid-configuration", status=200)
+
+    assert build.call_count == 1
+    assert first.body == second.body
+
+
+def test_discovery_documents_conditional_requests(testclient):
+    """Test that the discovery documents and the JWKS support conditional requests."""
+    for url in [
+        "/.well-known/openid-configuration",
+        "/.well-known/oauth-authorization-server",
+        "/oauth/jwks.json",
+    ]:
+        res = testclient.get(url, status=200)
+        etag = res.headers["ETag"]
+        assert not etag.startswith("W/")
+        assert "public" in res.headers["Cache-Control"]
+        assert "max-age=300" in res.headers["Cache-Control"]
+
+        res = testclient.get(url, headers={"If-None-Match": etag}, status=304)
+        assert res.body == b""
+
+        testclient.get(url, headers={"If-None-Match": '"other"'}, status=200)
+
+
+def test_discovery_documents_follow_the_keys(testclient, server_jwk, ec_jwk):
+    """Test that the documents are rebuilt when the keys change."""
+    res = testclient.get("/.well-known/openid-configuration", status=200)
+    etag = res.headers["ETag"]
+    assert "ES256" not in res.json["id_token_signing_alg_values_supported"]
+    jwks_etag = testclient.get("/oauth/jwks.json", status=200).headers["ETag"]
+
+    testclient.app.config["CANAILLE_OIDC"]["INACTIVE_JWKS"] = [
+        ec_jwk.as_dict(private=True),
+    ]
+    res = testclient.get("/oauth/jwks.json", status=200)
+    assert res.headers["ETag"] != jwks_etag
+    assert ec_jwk.kid in [key["kid"] for key in res.json["keys"]]
+
+    testclient.app.config["CANAILLE_OIDC"]["ACTIVE_JWKS"] = [
+        ec_jwk.as_dict(private=True),
+        server_jwk.as_dict(private=True),
+    ]
+    res = testclient.get(
+        "/.well-known/openid-configuration",
+        headers={"If-None-Match": etag},
+        status=200,
+    )
+    assert res.headers["ETag"] != etag
+    assert "ES256" in res.json["id_token_signing_alg_values_supported"]
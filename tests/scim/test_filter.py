@@ -0,0 +1,196 @@
+import datetime
+
+import pytest
+from scim2_models import InvalidFilterException
+from werkzeug.test import Client
+
+from canaille.app import models
+from canaille.backends.filters import And
+from canaille.backends.filters import Comparison
+from canaille.backends.filters import Not
+from canaille.backends.filters import Or
+from canaille.scim.filter import NOTHING
+from canaille.scim.filter import parse_filter
+from canaille.scim.filter import scim_filter_to_where
+
+from .conftest import _scim_headers
+
+
+def test_parse_filter():
+    """Filters are parsed with the RFC7644 precedence and value paths."""
+    assert parse_filter('userName eq "user"') == Comparison("userName", "eq", "user")
+    assert parse_filter("title pr") == Comparison("title", "pr")
+    assert parse_filter('a eq 1 or b eq true and not (c sw "x")') == Or(
+        [
+            Comparison("a", "eq", 1),
+            And([Comparison("b", "eq", True), Not(Comparison("c", "sw", "x"))]),
+        ]
+    )
+    assert parse_filter('emails[value co "doe" OR value ew ".test"]') == Or(
+        [
+            Comparison("emails.value", "co", "doe"),
+            Comparison("emails.value", "ew", ".test"),
+        ]
+    )
+    assert parse_filter(r'title eq "say \"hi\""') == Comparison(
+        "title", "eq", 'say "hi"'
+    )
+
+
+@pytest.mark.parametrize(
+    "filter",
+    [
+        "",
+        "userName",
+        'userName foo "user"',
+        'userName eq "user" and',
+        '(userName eq "user"',
+        "userName eq user",
+        'emails[value eq "a" ]]',
+        'emails[type[value eq "a"]]',
+    ],
+)
+def test_parse_invalid_filter(filter):
+    with pytest.raises(InvalidFilterException):
+        parse_filter(filter)
+
+
+def test_scim_filter_to_where(backend):
+    """SCIM attribute paths are translated into Canaille attributes."""
+    assert scim_filter_to_where(
+        'urn:ietf:params:scim:schemas:core:2.0:User:userName eq "user"', models.User
+    ) == Comparison("user_name", "eq", "user")
+    assert scim_filter_to_where(
+        'name.familyName sw "D" and emails.value co "doe"', models.User
+    ) == And(
+        [
+            Comparison("family_name", "sw", "D"),
+            Comparison("emails", "co", "doe"),
+        ]
+    )
+    assert scim_filter_to_where("active eq false", models.User) == Comparison(
+        "lock_date", "pr"
+    )
+    assert scim_filter_to_where(
+        'meta.lastModified gt "2020-01-01T00:00:00+00:00"', models.Group
+    ) == Comparison(
+        "last_modified",
+        "gt",
+        datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+    assert scim_filter_to_where('externalId eq "foo"', models.User) == NOTHING
+
+
+@pytest.mark.parametrize(
+    "filter",
+    [
+        'password eq "foo"',
+        'userName eq "user"',
+        'displayName gt "foo" and members pr',
+        'meta.created gt "yesterday"',
+        "displayName eq 12",
+    ],
+)
+def test_scim_filter_to_where_invalid(backend, filter):
+    with pytest.raises(InvalidFilterException):
+        scim_filter_to_where(filter, models.Group)
+
+
+def test_query_users_filter(app, backend, user, admin, moderator, oidc_token):
+    """GET on the users collection only returns the users matching the filter."""
+    client = Client(app)
+    headers = _scim_headers(app, oidc_token)
+
+    def query(filter):
+        response = client.get(
+            "/scim/v2/Users", query_string={"filter": filter}, headers=headers
+        )
+        assert response.status_code == 200, response.json
+        payload = response.get_json()
+        ids = {resource["id"] for resource in payload.get("Resources", [])}
+        assert payload["totalResults"] == len(ids)
+        return ids
+
+    assert query('userName eq "user"') == {user.id}
+    assert query('userName eq "USER"') == set()
+    assert query('userName sw "ADM" or emails[value co "JACK"]') == {
+        admin.id,
+        moderator.id,
+    }
+    assert query('not (userName eq "user") and name.familyName eq "Doe"') == {
+        admin.id,
+        moderator.id,
+    }
+    assert query('externalId eq "foo"') == set()
+
+    admin.lock_date = datetime.datetime.now(datetime.timezone.utc)
+    backend.save(admin)
+    assert query("active eq true") == {user.id, moderator.id}
+    assert query("active eq false") == {admin.id}
+
+    backend.reload(user)
+    last_modified = user.last_modified.isoformat()
+    assert admin.id in query(f'meta.lastModified ge "{last_modified}"')
+    assert user.id not in query(f'meta.lastModified gt "{last_modified}"')
+
+
+def test_query_groups_filter(app, backend, foo_group, bar_group, oidc_token):
+    """GET on the groups collection only returns the groups matching the filter."""
+    client = Client(app)
+    headers = _scim_headers(app, oidc_token)
+
+    response = client.get(
+        "/scim/v2/Groups",
+        query_string={"filter": 'displayName eq "foo"'},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["totalResults"] == 1
+    assert [resource["id"] for resource in payload["Resources"]] == [foo_group.id]
+
+
+def test_query_invalid_filter(app, backend, user, oidc_token):
+    """Invalid filters are rejected with an invalidFilter error."""
+    client = Client(app)
+    headers = _scim_headers(app, oidc_token)
+
+    for filter in ('userName eq "user" and', 'password eq "foo"'):
+        response = client.get(
+            "/scim/v2/Users", query_string={"filter": filter}, headers=headers
+        )
+        assert response.status_code == 400
+        assert response.get_json()["scimType"] == "invalidFilter"
+
+
+def test_search_filter(app, backend, user, admin, foo_group, bar_group, oidc_token):
+    """POST on /.search filters the users and the groups."""
+    client = Client(app)
+    headers = _scim_headers(app, oidc_token)
+
+    response = client.post(
+        "/scim/v2/.search",
+        json={
+            "schemas": ["urn:ietf:params:scim:api:messages:2.0:SearchRequest"],
+            "filter": 'userName eq "user" or displayName eq "bar"',
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.json
+    payload = response.get_json()
+    assert payload["totalResults"] == 2
+    assert {resource["id"] for resource in payload["Resources"]} == {
+        user.id,
+        bar_group.id,
+    }
+
+    response = client.post(
+        "/scim/v2/.search",
+        json={
+            "schemas": ["urn:ietf:params:scim:api:messages:2.0:SearchRequest"],
+            "filter": 'nickName eq "foo"',
+        },
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.get_json()["scimType"] == "invalidFilter"
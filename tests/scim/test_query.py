@@ -0,0 +1,48 @@
+from werkzeug.test import Client
+
+from .conftest import _scim_headers
+
+
+def test_query_users_pagination(app, backend, user, admin, moderator, oidc_token):
+    """GET on the users collection returns the requested slice and the total count."""
+    client = Client(app)
+    headers = _scim_headers(app, oidc_token)
+
+    response = client.get("/scim/v2/Users", headers=headers)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["totalResults"] == 3
+    all_ids = [resource["id"] for resource in payload["Resources"]]
+    assert sorted(all_ids) == sorted([user.id, admin.id, moderator.id])
+
+    response = client.get("/scim/v2/Users?startIndex=1&count=2", headers=headers)
+    payload = response.get_json()
+    assert payload["totalResults"] == 3
+    assert payload["startIndex"] == 1
+    assert payload["itemsPerPage"] == 2
+    first_page = [resource["id"] for resource in payload["Resources"]]
+    assert len(first_page) == 2
+
+    response = client.get("/scim/v2/Users?startIndex=3&count=2", headers=headers)
+    payload = response.get_json()
+    assert payload["totalResults"] == 3
+    second_page = [resource["id"] for resource in payload["Resources"]]
+    assert len(second_page) == 1
+    assert sorted(first_page + second_page) == sorted(all_ids)
+
+    response = client.get("/scim/v2/Users?count=1", headers=headers)
+    payload = response.get_json()
+    assert payload["totalResults"] == 3
+    assert [resource["id"] for resource in payload["Resources"]] == first_page[:1]
+
+
+def test_query_users_count_above_maximum(app, backend, user, oidc_token):
+    """The count parameter is capped to the maximum page size."""
+    client = Client(app)
+    headers = _scim_headers(app, oidc_token)
+
+    response = client.get("/scim/v2/Users?count=5000", headers=headers)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["itemsPerPage"] == 1000
+    assert [resource["id"] for resource in payload["Resources"]] == [user.id]